@@ -7,48 +7,110 @@ Serves the frontend directly from the repo root.
 
 import atexit
 import logging
+import os
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from flask import Flask, send_from_directory
+from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 
+from . import processing
 from .camera import get_camera
+from .timelapse import Timelapse
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Data directory (only for calibration files and library - read-only)
+# Data directory (calibration files; the library search index is cached here)
 DATA_DIR = Path("~/.kat").expanduser()
 
 # Frontend files are in the repo root (one level up from backend/)
 FRONTEND_DIR = Path(__file__).resolve().parent.parent
 
 
+def _warm_up(camera) -> None:
+    """Initialize camera backend and processing stack, logging a startup profile."""
+    start = time.perf_counter()
+    profile = camera.warm_up()
+    profile.update(processing.warm_up())
+
+    for step, duration in profile.items():
+        logger.info("Startup profile: %-40s %7.1f ms", step, duration * 1000)
+    logger.info(
+        "Warm-up finished in %.1f ms (camera ready: %s, processing ready: %s)",
+        (time.perf_counter() - start) * 1000, camera.is_ready(), processing.is_ready(),
+    )
+
+
 def create_app() -> Flask:
-    """Create and configure Flask application."""
+    """
+    Create and configure Flask application.
+
+    Returns quickly so static content (index.html for the pi-loader) is served
+    right away; the camera backend and processing stack are initialized in a
+    background thread. Use /ready to check when capture is available.
+    """
+    start = time.perf_counter()
     app = Flask(__name__)
 
     # Enable CORS for cross-origin API calls (webapp hosted on GitHub Pages)
     # allow_private_network=True enables Private Network Access for older Chrome versions
     CORS(app, resources={r"/api/*": {"origins": "*"}}, allow_private_network=True)
 
-    # Store global state in app config
+    # Store global state in app config (cheap: hardware is initialized lazily)
     camera = get_camera()
     app.config["camera"] = camera
     app.config["DATA_DIR"] = DATA_DIR
+    app.config["LIBRARY_PATH"] = FRONTEND_DIR / "data" / "library.json"
+    # Search index for the library; kept out of FRONTEND_DIR, which is served publicly
+    app.config["LIBRARY_INDEX_PATH"] = DATA_DIR / "library_index.npz"
+    app.config["TRACE_MEMORY"] = os.environ.get("KAT_TRACE_MEMORY") == "1"
     atexit.register(camera.close)
 
+    timelapse = Timelapse(camera, DATA_DIR)
+    app.config["timelapse"] = timelapse
+    atexit.register(timelapse.stop, 10.0)
+
     # Ephemeral settings (not persisted - browser owns the settings)
     app.config["settings"] = {
         "shutter": 5.0,  # seconds
         "gain": 100.0,
         "laser_auto_detect": True,
         "laser_wavelength": 785.0,
+        "roi_enabled": True,  # Crop acquisition to the calibrated spectral band
     }
 
+    # Publish-to-ack latency of WebSocket preview frames (seconds)
+    app.config["preview_ws_latency"] = deque(maxlen=30)
+
     # Register API routes
-    from .routes import api_bp
+    from .routes import api_bp, sock
     app.register_blueprint(api_bp, url_prefix="/api")
+    if sock is not None:
+        sock.init_app(app)
+    else:
+        logger.info("flask-sock not installed, WebSocket preview disabled")
+
+    @app.route("/health")
+    def health():
+        """Liveness check: the server is up and serving requests."""
+        return jsonify({"status": "ok"})
+
+    @app.route("/ready")
+    def ready():
+        """Readiness check: camera and processing are initialized."""
+        camera_ready = camera.is_ready()
+        processing_ready = processing.is_ready()
+        body = {
+            "ready": camera_ready and processing_ready,
+            "camera": camera_ready,
+            "processing": processing_ready,
+            "camera_error": camera.init_error(),
+            "processing_error": processing.init_error(),
+        }
+        return jsonify(body), 200 if body["ready"] else 503
 
     @app.route("/")
     def index():
@@ -60,6 +122,9 @@ def create_app() -> Flask:
         """Serve frontend static files (CSS, JS, data, locales, icons, etc.)."""
         return send_from_directory(FRONTEND_DIR, filename)
 
+    threading.Thread(target=_warm_up, args=(camera,), name="warm-up", daemon=True).start()
+    logger.info("App created in %.1f ms", (time.perf_counter() - start) * 1000)
+
     return app
 
 
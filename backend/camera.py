@@ -1,5 +1,6 @@
 """Local camera interface for Raspberry Pi using picamera2."""
 
+import importlib.util
 import io
 import logging
 import os
@@ -8,20 +9,36 @@ import tempfile
 import threading
 import time
 from collections import deque
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
+
+from .roi import Roi
 
 logger = logging.getLogger(__name__)
 
-# picamera2 is only available on Raspberry Pi
-try:
-    from picamera2 import Picamera2
-    from picamera2.encoders import MJPEGEncoder
-    from picamera2.outputs import FileOutput
-    PICAMERA2_AVAILABLE = True
-    logger.info("picamera2 imported successfully")
-except ImportError as e:
-    PICAMERA2_AVAILABLE = False
-    logger.warning("picamera2 not available: %s", e)
+# picamera2 is only available on Raspberry Pi. Importing it loads libcamera and
+# takes seconds on a Pi, so only check for it here and import on first use.
+PICAMERA2_AVAILABLE = importlib.util.find_spec("picamera2") is not None
+
+Picamera2 = None
+MJPEGEncoder = None
+FileOutput = None
+_import_lock = threading.Lock()
+
+
+def _import_picamera2() -> None:
+    """Import picamera2 into module globals (idempotent, thread-safe)."""
+    global Picamera2, MJPEGEncoder, FileOutput
+
+    with _import_lock:
+        if Picamera2 is not None:
+            return
+        from picamera2 import Picamera2 as _Picamera2
+        from picamera2.encoders import MJPEGEncoder as _MJPEGEncoder
+        from picamera2.outputs import FileOutput as _FileOutput
+        MJPEGEncoder = _MJPEGEncoder
+        FileOutput = _FileOutput
+        Picamera2 = _Picamera2
+        logger.info("picamera2 imported successfully")
 
 
 class StreamOutput(io.BufferedIOBase):
@@ -30,6 +47,7 @@ class StreamOutput(io.BufferedIOBase):
     def __init__(self) -> None:
         self._buffer = io.BytesIO()
         self._frame: Optional[bytes] = None
+        self._frame_time = 0.0  # time.time() when the frame was published
         self._condition = threading.Condition()
 
     def writable(self) -> bool:
@@ -47,6 +65,7 @@ class StreamOutput(io.BufferedIOBase):
                 frame = self._buffer.getvalue()
                 if frame:
                     self._frame = frame
+                    self._frame_time = time.time()
                     self._condition.notify_all()
                 self._buffer.seek(0)
                 self._buffer.truncate(0)
@@ -55,6 +74,10 @@ class StreamOutput(io.BufferedIOBase):
 
     def get_frame(self, timeout: float = 1.0) -> Optional[bytes]:
         """Get the next available frame, waiting up to `timeout` seconds."""
+        return self.get_frame_with_time(timeout)[0]
+
+    def get_frame_with_time(self, timeout: float = 1.0) -> Tuple[Optional[bytes], float]:
+        """Like get_frame(), also returning the time the frame was published."""
         with self._condition:
             start_frame = self._frame
             deadline = time.monotonic() + timeout
@@ -65,7 +88,7 @@ class StreamOutput(io.BufferedIOBase):
                     break
                 self._condition.wait(timeout=remaining)
 
-            return self._frame
+            return self._frame, self._frame_time
 
 
 class LocalCamera:
@@ -89,6 +112,7 @@ class LocalCamera:
         self._stream_output: Optional[StreamOutput] = None
         self._encoder: Optional["MJPEGEncoder"] = None
         self._streaming = False
+        self._still_session = False
         self._lock = threading.RLock()
 
         # Stream statistics (protected by _lock)
@@ -98,11 +122,127 @@ class LocalCamera:
         self._frame_times: deque[float] = deque(maxlen=30)
         self._exposure_time = 0  # microseconds, from camera metadata
 
+        # Background initialization state (see warm_up())
+        self._ready = threading.Event()
+        self._init_error: Optional[str] = None
+
+        # Sensor geometry (probed on first use, see full_frame_size()) and acquisition ROI
+        self._full_size: Optional[Tuple[int, int]] = None
+        self._scaler_crop_max: Optional[Tuple[int, int, int, int]] = None
+        self._roi: Optional[Roi] = None
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Import picamera2 and check that a sensor is connected.
+
+        Meant to run in a background thread at startup so the server can serve
+        static content immediately. The camera itself is not opened, since
+        rpicam-still needs exclusive access for captures; the sensor geometry
+        needed for ROI cropping is read on first use (see full_frame_size()).
+
+        Returns:
+            Mapping of step name to duration in seconds (startup profile)
+        """
+        profile = {}
+        try:
+            start = time.perf_counter()
+            _import_picamera2()
+            profile["import picamera2"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            cameras = Picamera2.global_camera_info()
+            profile["camera enumeration"] = time.perf_counter() - start
+            if not cameras:
+                raise RuntimeError("No camera detected")
+            logger.info("Camera detected: %s", cameras[0].get("Model", "unknown"))
+
+            self._init_error = None
+            self._ready.set()
+        except Exception as e:
+            logger.error("Camera initialization failed: %s", e)
+            self._init_error = str(e)
+        return profile
+
+    def _probe_sensor(self) -> None:
+        """
+        Read full-frame size and scaler crop limits from the sensor.
+
+        Uses the open camera if there is one, otherwise opens it briefly.
+        """
+        with self._lock:
+            if self._full_size is not None:
+                return
+            _import_picamera2()
+            camera = self._camera
+            if camera is None:
+                camera = Picamera2()
+            try:
+                properties = camera.camera_properties
+                full_size = tuple(properties["PixelArraySize"])
+                self._scaler_crop_max = tuple(
+                    properties.get("ScalerCropMaximum", (0, 0) + full_size)
+                )
+                self._full_size = full_size
+                logger.info("Sensor full frame: %dx%d", *full_size)
+            finally:
+                if camera is not self._camera:
+                    camera.close()
+
+    def is_ready(self) -> bool:
+        """Check if camera backend is initialized."""
+        return self._ready.is_set()
+
+    def init_error(self) -> Optional[str]:
+        """Get the camera initialization error, if any."""
+        return self._init_error
+
+    def full_frame_size(self) -> Optional[Tuple[int, int]]:
+        """
+        Get the (width, height) of a full-frame capture.
+
+        The sensor is probed on first use and again on later calls if the
+        probe failed (e.g. camera busy). Returns None while it is unknown,
+        in which case acquisition stays full frame.
+        """
+        if self._full_size is None and PICAMERA2_AVAILABLE:
+            try:
+                self._probe_sensor()
+            except Exception as e:
+                logger.warning(f"Sensor probe failed, using full frame: {e}")
+        return self._full_size
+
+    def set_roi(self, roi: Optional[Roi]) -> None:
+        """
+        Set the acquisition ROI (None for full frame).
+
+        Applies to the next start_preview(), capture_photo() and
+        start_still_session(); a running preview must be restarted.
+        """
+        with self._lock:
+            self._roi = roi
+
+    def get_roi(self) -> Optional[Roi]:
+        """Get the acquisition ROI (None for full frame)."""
+        return self._roi
+
+    def _scaler_crop(self, roi: Roi) -> Tuple[int, int, int, int]:
+        """Convert a full-frame ROI to ScalerCrop (sensor) coordinates."""
+        x0, y0, width, height = self._scaler_crop_max or (0, 0, roi.full_width, roi.full_height)
+        scale_x = width / roi.full_width
+        scale_y = height / roi.full_height
+        return (
+            x0 + int(roi.x * scale_x),
+            y0 + int(roi.y * scale_y),
+            int(roi.width * scale_x),
+            int(roi.height * scale_y),
+        )
+
     def _get_camera(self) -> "Picamera2":
         """Get or create camera instance."""
         if not PICAMERA2_AVAILABLE:
             raise RuntimeError("picamera2 is not available. This must run on a Raspberry Pi.")
 
+        _import_picamera2()
         if self._camera is None:
             self._camera = Picamera2()
         return self._camera
@@ -130,12 +270,20 @@ class LocalCamera:
             logger.info("Getting camera instance...")
             camera = self._get_camera()
 
+            controls = {"FrameRate": framerate}
+            roi = self._roi
+            if roi is not None:
+                # Sensor crop to the spectral band, keeping its aspect ratio
+                controls["ScalerCrop"] = self._scaler_crop(roi)
+                height = max(2, int(width * roi.height / roi.width) & ~1)
+                logger.info("Preview ROI: %s (ScalerCrop %s)", roi, controls["ScalerCrop"])
+
             # Configure for video preview
             logger.info("Creating video config (%dx%d @ %d fps)...", width, height, framerate)
             video_config = camera.create_video_configuration(
                 main={"size": (width, height), "format": "RGB888"},
                 encode="main",
-                controls={"FrameRate": framerate},
+                controls=controls,
             )
             logger.info("Configuring camera...")
             camera.configure(video_config)
@@ -190,6 +338,18 @@ class LocalCamera:
         Returns:
             JPEG frame data, or None if not streaming
         """
+        info = self.get_frame_info()
+        return info[0] if info else None
+
+    def get_frame_info(self) -> Optional[Tuple[bytes, float, int]]:
+        """
+        Get the latest preview frame with its metadata.
+
+        Returns:
+            Tuple of (JPEG frame data, publish timestamp, exposure_us),
+            or None if not streaming. The publish timestamp is the time.time()
+            at which the encoder delivered the frame, not the sensor capture time.
+        """
         # Copy reference under lock to avoid race with stop_preview()
         with self._lock:
             if not self._streaming:
@@ -199,7 +359,7 @@ class LocalCamera:
         if stream_output is None:
             return None
 
-        frame = stream_output.get_frame()
+        frame, publish_time = stream_output.get_frame_with_time()
 
         if frame:
             # Update statistics under lock
@@ -224,7 +384,11 @@ class LocalCamera:
                     except Exception:
                         pass  # Ignore metadata errors
 
-        return frame
+                exposure_us = self._exposure_time
+
+        if not frame:
+            return None
+        return frame, publish_time, exposure_us
 
     def get_stats(self) -> Tuple[int, float, float, int]:
         """
@@ -282,6 +446,7 @@ class LocalCamera:
                 self._camera = None
                 self._encoder = None
                 self._streaming = False
+                self._still_session = False
                 self._stream_output = None
                 logger.info("Preview stopped")
 
@@ -300,6 +465,14 @@ class LocalCamera:
                     '--gain', str(gain),
                     '-o', tmp_path,
                 ]
+                roi = self._roi
+                if roi is not None:
+                    # Crop to the spectral band at native resolution (no scaling)
+                    cmd += [
+                        '--roi', ','.join(f"{v:.6f}" for v in roi.normalized()),
+                        '--width', str(roi.width),
+                        '--height', str(roi.height),
+                    ]
                 logger.info("Running command: %s", ' '.join(cmd))
 
                 result = subprocess.run(cmd, capture_output=True, text=True)
@@ -326,11 +499,88 @@ class LocalCamera:
 
         return jpeg_bytes
 
+    def start_still_session(
+        self,
+        shutter_us: int = 5000000,
+        gain: float = 100.0,
+    ) -> None:
+        """
+        Configure the camera for repeated still captures with fixed exposure.
+
+        Unlike capture_photo(), the camera stays open and configured between
+        shots, so capture_still() only pays for the exposure itself.
+        Stops preview if running.
+
+        Args:
+            shutter_us: Shutter speed in microseconds
+            gain: Camera gain
+        """
+        logger.info("start_still_session() called with shutter_us=%d, gain=%f", shutter_us, gain)
+        with self._lock:
+            if self._streaming:
+                self.stop_preview()
+
+            camera = self._get_camera()
+            controls = {
+                "AeEnable": False,
+                "ExposureTime": shutter_us,
+                "AnalogueGain": gain,
+                # Frame duration must allow the full exposure
+                "FrameDurationLimits": (shutter_us, shutter_us),
+            }
+            config_kwargs = {}
+            roi = self._roi
+            if roi is not None:
+                controls["ScalerCrop"] = self._scaler_crop(roi)
+                config_kwargs["main"] = {"size": (roi.width, roi.height)}
+
+            still_config = camera.create_still_configuration(controls=controls, **config_kwargs)
+            camera.configure(still_config)
+            camera.start()
+            self._still_session = True
+
+    def capture_still(self) -> bytes:
+        """
+        Capture a JPEG within a session started by start_still_session().
+
+        Returns:
+            JPEG image data as bytes
+        """
+        with self._lock:
+            if not self._still_session or self._camera is None:
+                raise RuntimeError("No still session active")
+
+            buffer = io.BytesIO()
+            metadata = self._camera.capture_file(buffer, format="jpeg")
+            if metadata:
+                self._exposure_time = metadata.get("ExposureTime", self._exposure_time)
+            return buffer.getvalue()
+
+    def stop_still_session(self) -> None:
+        """End a still session and release the camera."""
+        with self._lock:
+            if not self._still_session:
+                return
+
+            if self._camera:
+                try:
+                    self._camera.stop()
+                except Exception:
+                    pass
+                try:
+                    self._camera.close()
+                except Exception:
+                    pass
+                self._camera = None
+            self._still_session = False
+
     def close(self) -> None:
         """Release camera resources."""
         with self._lock:
             if self._streaming:
                 self.stop_preview()
+            if self._still_session:
+                self.stop_still_session()
 
             if self._camera:
                 self._camera.close()
@@ -343,17 +593,74 @@ class LocalCamera:
         self.close()
 
 
+# Minimal valid JPEG (1x1 red pixel) returned by MockCamera
+_MOCK_JPEG = bytes([
+    0xFF, 0xD8, 0xFF, 0xE0, 0x00, 0x10, 0x4A, 0x46, 0x49, 0x46, 0x00, 0x01,
+    0x01, 0x00, 0x00, 0x01, 0x00, 0x01, 0x00, 0x00, 0xFF, 0xDB, 0x00, 0x43,
+    0x00, 0x08, 0x06, 0x06, 0x07, 0x06, 0x05, 0x08, 0x07, 0x07, 0x07, 0x09,
+    0x09, 0x08, 0x0A, 0x0C, 0x14, 0x0D, 0x0C, 0x0B, 0x0B, 0x0C, 0x19, 0x12,
+    0x13, 0x0F, 0x14, 0x1D, 0x1A, 0x1F, 0x1E, 0x1D, 0x1A, 0x1C, 0x1C, 0x20,
+    0x24, 0x2E, 0x27, 0x20, 0x22, 0x2C, 0x23, 0x1C, 0x1C, 0x28, 0x37, 0x29,
+    0x2C, 0x30, 0x31, 0x34, 0x34, 0x34, 0x1F, 0x27, 0x39, 0x3D, 0x38, 0x32,
+    0x3C, 0x2E, 0x33, 0x34, 0x32, 0xFF, 0xC0, 0x00, 0x0B, 0x08, 0x00, 0x01,
+    0x00, 0x01, 0x01, 0x01, 0x11, 0x00, 0xFF, 0xC4, 0x00, 0x1F, 0x00, 0x00,
+    0x01, 0x05, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08,
+    0x09, 0x0A, 0x0B, 0xFF, 0xC4, 0x00, 0xB5, 0x10, 0x00, 0x02, 0x01, 0x03,
+    0x03, 0x02, 0x04, 0x03, 0x05, 0x05, 0x04, 0x04, 0x00, 0x00, 0x01, 0x7D,
+    0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06,
+    0x13, 0x51, 0x61, 0x07, 0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xA1, 0x08,
+    0x23, 0x42, 0xB1, 0xC1, 0x15, 0x52, 0xD1, 0xF0, 0x24, 0x33, 0x62, 0x72,
+    0x82, 0x09, 0x0A, 0x16, 0x17, 0x18, 0x19, 0x1A, 0x25, 0x26, 0x27, 0x28,
+    0x29, 0x2A, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3A, 0x43, 0x44, 0x45,
+    0x46, 0x47, 0x48, 0x49, 0x4A, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59,
+    0x5A, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69, 0x6A, 0x73, 0x74, 0x75,
+    0x76, 0x77, 0x78, 0x79, 0x7A, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
+    0x8A, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9A, 0xA2, 0xA3,
+    0xA4, 0xA5, 0xA6, 0xA7, 0xA8, 0xA9, 0xAA, 0xB2, 0xB3, 0xB4, 0xB5, 0xB6,
+    0xB7, 0xB8, 0xB9, 0xBA, 0xC2, 0xC3, 0xC4, 0xC5, 0xC6, 0xC7, 0xC8, 0xC9,
+    0xCA, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0xDA, 0xE1, 0xE2,
+    0xE3, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xE9, 0xEA, 0xF1, 0xF2, 0xF3, 0xF4,
+    0xF5, 0xF6, 0xF7, 0xF8, 0xF9, 0xFA, 0xFF, 0xDA, 0x00, 0x08, 0x01, 0x01,
+    0x00, 0x00, 0x3F, 0x00, 0xFB, 0xD5, 0xDB, 0x20, 0xA8, 0xBA, 0xAE, 0xAF,
+    0xE7, 0xFF, 0xD9
+])
+
+
 # Mock camera for development/testing on non-Pi systems
 class MockCamera:
     """Mock camera for testing on non-Raspberry Pi systems."""
 
     def __init__(self):
         self._streaming = False
+        self._still_session = False
         self._frame_count = 0
+        self._frame_interval = 1.0 / 15
+        self._next_frame_time = 0.0
+
+    def warm_up(self) -> Dict[str, float]:
+        return {}
+
+    def is_ready(self) -> bool:
+        return True
+
+    def init_error(self) -> Optional[str]:
+        return None
+
+    def full_frame_size(self) -> Optional[Tuple[int, int]]:
+        return None
+
+    def set_roi(self, roi: Optional[Roi]) -> None:
+        pass
+
+    def get_roi(self) -> Optional[Roi]:
+        return None
 
     def start_preview(self, width: int = 640, height: int = 480, framerate: int = 15) -> None:
         self._streaming = True
         self._frame_count = 0
+        self._frame_interval = 1.0 / framerate
+        self._next_frame_time = time.monotonic()
 
     def stop_preview(self) -> None:
         self._streaming = False
@@ -362,39 +669,18 @@ class MockCamera:
         if not self._streaming:
             return None
 
-        # Return a minimal valid JPEG (1x1 red pixel)
+        # Deliver frames at the preview frame rate, like the real camera
+        delay = self._next_frame_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame_time = max(self._next_frame_time, time.monotonic() - self._frame_interval) + self._frame_interval
+
         self._frame_count += 1
-        return bytes([
-            0xFF, 0xD8, 0xFF, 0xE0, 0x00, 0x10, 0x4A, 0x46, 0x49, 0x46, 0x00, 0x01,
-            0x01, 0x00, 0x00, 0x01, 0x00, 0x01, 0x00, 0x00, 0xFF, 0xDB, 0x00, 0x43,
-            0x00, 0x08, 0x06, 0x06, 0x07, 0x06, 0x05, 0x08, 0x07, 0x07, 0x07, 0x09,
-            0x09, 0x08, 0x0A, 0x0C, 0x14, 0x0D, 0x0C, 0x0B, 0x0B, 0x0C, 0x19, 0x12,
-            0x13, 0x0F, 0x14, 0x1D, 0x1A, 0x1F, 0x1E, 0x1D, 0x1A, 0x1C, 0x1C, 0x20,
-            0x24, 0x2E, 0x27, 0x20, 0x22, 0x2C, 0x23, 0x1C, 0x1C, 0x28, 0x37, 0x29,
-            0x2C, 0x30, 0x31, 0x34, 0x34, 0x34, 0x1F, 0x27, 0x39, 0x3D, 0x38, 0x32,
-            0x3C, 0x2E, 0x33, 0x34, 0x32, 0xFF, 0xC0, 0x00, 0x0B, 0x08, 0x00, 0x01,
-            0x00, 0x01, 0x01, 0x01, 0x11, 0x00, 0xFF, 0xC4, 0x00, 0x1F, 0x00, 0x00,
-            0x01, 0x05, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x00, 0x00, 0x00, 0x00,
-            0x00, 0x00, 0x00, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08,
-            0x09, 0x0A, 0x0B, 0xFF, 0xC4, 0x00, 0xB5, 0x10, 0x00, 0x02, 0x01, 0x03,
-            0x03, 0x02, 0x04, 0x03, 0x05, 0x05, 0x04, 0x04, 0x00, 0x00, 0x01, 0x7D,
-            0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06,
-            0x13, 0x51, 0x61, 0x07, 0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xA1, 0x08,
-            0x23, 0x42, 0xB1, 0xC1, 0x15, 0x52, 0xD1, 0xF0, 0x24, 0x33, 0x62, 0x72,
-            0x82, 0x09, 0x0A, 0x16, 0x17, 0x18, 0x19, 0x1A, 0x25, 0x26, 0x27, 0x28,
-            0x29, 0x2A, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3A, 0x43, 0x44, 0x45,
-            0x46, 0x47, 0x48, 0x49, 0x4A, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59,
-            0x5A, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69, 0x6A, 0x73, 0x74, 0x75,
-            0x76, 0x77, 0x78, 0x79, 0x7A, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
-            0x8A, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9A, 0xA2, 0xA3,
-            0xA4, 0xA5, 0xA6, 0xA7, 0xA8, 0xA9, 0xAA, 0xB2, 0xB3, 0xB4, 0xB5, 0xB6,
-            0xB7, 0xB8, 0xB9, 0xBA, 0xC2, 0xC3, 0xC4, 0xC5, 0xC6, 0xC7, 0xC8, 0xC9,
-            0xCA, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0xDA, 0xE1, 0xE2,
-            0xE3, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xE9, 0xEA, 0xF1, 0xF2, 0xF3, 0xF4,
-            0xF5, 0xF6, 0xF7, 0xF8, 0xF9, 0xFA, 0xFF, 0xDA, 0x00, 0x08, 0x01, 0x01,
-            0x00, 0x00, 0x3F, 0x00, 0xFB, 0xD5, 0xDB, 0x20, 0xA8, 0xBA, 0xAE, 0xAF,
-            0xE7, 0xFF, 0xD9
-        ])
+        return _MOCK_JPEG
+
+    def get_frame_info(self) -> Optional[Tuple[bytes, float, int]]:
+        frame = self.get_frame()
+        return (frame, time.time(), 5000) if frame else None
 
     def get_stats(self) -> Tuple[int, float, float, int]:
         # Return mock exposure of 5000us (5ms) when streaming
@@ -411,8 +697,21 @@ class MockCamera:
         """Return mock JPEG bytes."""
         return self.get_frame() or b""
 
+    def start_still_session(self, shutter_us: int = 5000000, gain: float = 100.0) -> None:
+        self._streaming = False
+        self._still_session = True
+
+    def capture_still(self) -> bytes:
+        if not self._still_session:
+            raise RuntimeError("No still session active")
+        return _MOCK_JPEG
+
+    def stop_still_session(self) -> None:
+        self._still_session = False
+
     def close(self) -> None:
         self._streaming = False
+        self._still_session = False
 
     def __enter__(self) -> "MockCamera":
         return self
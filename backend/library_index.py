@@ -0,0 +1,514 @@
+"""Search index for the reference spectrum library.
+
+Exhaustive identification scores every 1301-point library spectrum per
+query. This index makes the search sublinear while returning the same top-K
+as exhaustive cosine/Pearson scoring (see ``identify`` in js/identifier.js).
+
+How it works:
+
+- Each library spectrum x is split into its mean part and its centered,
+  unit-normalized part z (Pearson vector). With a = sqrt(n) * mean / ||x||
+  and b = ||x - mean|| / ||x||:
+
+      cosine(q, x)  = a_q * a_x + b_q * b_x * pearson(q, x)
+      pearson(q, x) = z_q . z_x
+
+- The z vectors are projected onto the top principal components. For unit
+  vectors, z_q . z_x <= y_q . y_x + r_q * r_x, where y is the projection and
+  r the norm of the residual. This gives an upper bound on the combined score
+  for every library entry at the cost of a k-dimensional dot product.
+
+- Candidates are exactly re-scored in decreasing bound order until the
+  K-th best exact score beats the next bound, so results are exact.
+
+The index is built once per library file and persisted as library_index.npz
+in the server's data directory (not next to library.json, which is served
+publicly as part of the frontend); it is rebuilt automatically when
+library.json changes.
+
+Usage:
+    python -m backend.library_index data/library.json   # build + benchmark
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "library_index.npz"
+
+# Where the CLI persists the index (the server's data directory)
+DEFAULT_INDEX_PATH = Path("~/.kat").expanduser() / INDEX_FILENAME
+INDEX_FORMAT = 1
+
+# Number of principal components kept in the projection
+DEFAULT_COMPONENTS = 32
+
+# Library spectra used to fit the principal components
+PCA_SAMPLE_SIZE = 4096
+
+# Candidates exactly re-scored per round
+RERANK_CHUNK = 64
+
+# Library spectra normalized/projected at a time while building (bounds the
+# float64 temporaries to a chunk instead of the whole library)
+BUILD_CHUNK = 1024
+
+
+class IndexNotReady(Exception):
+    """The index for the current library is being built in the background."""
+
+
+def _normalize(data: np.ndarray) -> tuple:
+    """
+    Split spectra (rows) into (a, b, z) as described in the module docstring.
+
+    Zero spectra get a = b = 0 and z = 0, so both scores are 0 as in the
+    browser implementation.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data[np.newaxis, :]
+    n = data.shape[1]
+
+    mean = data.mean(axis=1)
+    centered = data - mean[:, np.newaxis]
+    norm = np.linalg.norm(data, axis=1)
+    centered_norm = np.linalg.norm(centered, axis=1)
+
+    safe_norm = np.where(norm > 0, norm, 1.0)
+    safe_centered_norm = np.where(centered_norm > 0, centered_norm, 1.0)
+
+    a = np.where(norm > 0, np.sqrt(n) * mean / safe_norm, 0.0)
+    b = np.where(norm > 0, centered_norm / safe_norm, 0.0)
+    z = np.where(centered_norm[:, np.newaxis] > 0, centered / safe_centered_norm[:, np.newaxis], 0.0)
+    return a, b, z
+
+
+class LibraryIndex:
+    """
+    PCA-bounded index over preprocessed library spectra.
+
+    Example:
+        >>> index = LibraryIndex.load_or_build(Path("data/library.json"), DEFAULT_INDEX_PATH)
+        >>> matches = index.identify(query, top_k=5)
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        z: np.ndarray,
+        a: np.ndarray,
+        b: np.ndarray,
+        components: np.ndarray,
+        projections: np.ndarray,
+        residuals: np.ndarray,
+        version: Optional[str] = None,
+        digest: Optional[str] = None,
+    ):
+        self.names = names
+        self.version = version
+        self.digest = digest
+        self._z = z
+        self._a = a
+        self._b = b
+        self._components = components
+        self._projections = projections
+        self._residuals = residuals
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def build(
+        cls,
+        library: Dict,
+        n_components: int = DEFAULT_COMPONENTS,
+        digest: Optional[str] = None,
+    ) -> "LibraryIndex":
+        """
+        Build an index from a parsed library.json.
+
+        Peak memory is the parsed library plus the float32 index: each
+        substance's "data" list is released (set to None) once converted.
+
+        Args:
+            library: Library data { version, wavelengthAxis, substances: [{name, data}] }
+            n_components: Number of principal components in the projection
+            digest: Content hash of the source file (used for staleness checks)
+        """
+        substances = library.get("substances") or []
+        names = [s["name"] for s in substances]
+        n_points = len(substances[0]["data"]) if substances else 0
+
+        # Normalize in row chunks straight into float32 z, releasing each
+        # parsed row once converted
+        z = np.empty((len(substances), n_points), dtype=np.float32)
+        a = np.empty(len(substances))
+        b = np.empty(len(substances))
+        for start in range(0, len(substances), BUILD_CHUNK):
+            chunk = substances[start:start + BUILD_CHUNK]
+            rows = np.array([s["data"] for s in chunk], dtype=np.float64)
+            for s in chunk:
+                s["data"] = None
+            a[start:start + len(chunk)], b[start:start + len(chunk)], z[start:start + len(chunk)] = _normalize(rows)
+            del rows
+
+        n_components = max(0, min(n_components, z.shape[0], z.shape[1]))
+        if n_components:
+            # Principal directions of the z vectors. The bound is exact for any
+            # orthonormal basis, so fitting on a subsample only affects pruning.
+            rng = np.random.default_rng(0)
+            sample = z[rng.choice(len(z), size=min(len(z), PCA_SAMPLE_SIZE), replace=False)].astype(np.float64)
+            sample -= sample.mean(axis=0)
+            _, eigenvectors = np.linalg.eigh(sample.T @ sample)
+            del sample
+            components = eigenvectors[:, ::-1][:, :n_components].T.copy()
+        else:
+            components = np.zeros((0, z.shape[1]))
+
+        projections = np.empty((len(z), len(components)))
+        residuals = np.empty(len(z))
+        for start in range(0, len(z), BUILD_CHUNK):
+            rows = z[start:start + BUILD_CHUNK].astype(np.float64)
+            proj = rows @ components.T
+            z_norm_sq = np.einsum("ij,ij->i", rows, rows)
+            projections[start:start + len(rows)] = proj
+            residuals[start:start + len(rows)] = np.sqrt(
+                np.maximum(z_norm_sq - np.einsum("ij,ij->i", proj, proj), 0.0)
+            )
+
+        return cls(
+            names=names,
+            z=z,
+            a=a,
+            b=b,
+            components=components,
+            projections=projections,
+            residuals=residuals,
+            version=library.get("version"),
+            digest=digest,
+        )
+
+    def save(self, path: Path) -> None:
+        """Persist the index as an uncompressed .npz (fast to load)."""
+        # Write to a temporary file first so readers never see a partial index
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format=np.array(INDEX_FORMAT),
+                names=np.array(self.names, dtype=str),
+                version=np.array(self.version or ""),
+                digest=np.array(self.digest or ""),
+                z=self._z,
+                a=self._a,
+                b=self._b,
+                components=self._components,
+                projections=self._projections,
+                residuals=self._residuals,
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LibraryIndex":
+        """Load an index saved with save()."""
+        with np.load(path) as f:
+            if int(f["format"]) != INDEX_FORMAT:
+                raise ValueError(f"Unsupported index format: {int(f['format'])}")
+            return cls(
+                names=f["names"].tolist(),
+                z=f["z"],
+                a=f["a"],
+                b=f["b"],
+                components=f["components"],
+                projections=f["projections"],
+                residuals=f["residuals"],
+                version=str(f["version"]) or None,
+                digest=str(f["digest"]) or None,
+            )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        library_path: Path,
+        index_path: Path,
+        n_components: int = DEFAULT_COMPONENTS,
+    ) -> "LibraryIndex":
+        """
+        Load the persisted index for library_path, rebuilding it if stale.
+
+        The index stored at index_path is keyed by a hash of library.json, so
+        it is rebuilt once per library version.
+        """
+        library_path = Path(library_path)
+        index_path = Path(index_path)
+        raw = library_path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if index_path.exists():
+            try:
+                index = cls.load(index_path)
+                if index.digest == digest:
+                    return index
+                logger.info("Library changed, rebuilding index")
+            except Exception as e:
+                logger.warning(f"Failed to load library index, rebuilding: {e}")
+
+        start = time.perf_counter()
+        index = cls.build(json.loads(raw), n_components=n_components, digest=digest)
+        logger.info(
+            "Built library index for %d spectra in %.1f ms",
+            len(index), (time.perf_counter() - start) * 1000,
+        )
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            index.save(index_path)
+        except OSError as e:
+            logger.warning(f"Failed to save library index: {e}")
+        return index
+
+    def _exact_scores(self, rows: np.ndarray, a_q: float, b_q: float, z_q: np.ndarray, cosine_weight: float) -> tuple:
+        """Exact (combined, cosine, pearson) scores for library rows."""
+        pearson = self._z[rows] @ z_q
+        cosine = a_q * self._a[rows] + b_q * self._b[rows] * pearson
+        combined = cosine_weight * cosine + (1 - cosine_weight) * pearson
+        return combined, cosine, pearson
+
+    def identify(
+        self,
+        query,
+        top_k: int = 5,
+        cosine_weight: float = 0.5,
+        max_candidates: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Identify a preprocessed query spectrum against the library.
+
+        Args:
+            query: Preprocessed spectrum (same axis as the library, 1301 points)
+            top_k: Number of top matches to return
+            cosine_weight: Weight for cosine similarity (Pearson gets the rest)
+            max_candidates: Cap on exactly re-scored candidates. None (default)
+                guarantees the exhaustive top-K; a cap trades recall for speed.
+
+        Returns:
+            Matches sorted by combined score, same fields as the browser identifier
+        """
+        if not 0.0 <= cosine_weight <= 1.0:
+            raise ValueError("cosine_weight must be between 0 and 1")
+        if len(self) == 0 or top_k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float64)
+        if query.shape != (self._z.shape[1],):
+            raise ValueError(f"Invalid query length {query.size}, expected {self._z.shape[1]}")
+
+        a_q, b_q, z_q = _normalize(query)
+        a_q, b_q, z_q = float(a_q[0]), float(b_q[0]), z_q[0]
+        top_k = min(top_k, len(self))
+
+        # Upper bound on the combined score of every entry (see module docstring)
+        y_q = self._components @ z_q
+        r_q = np.sqrt(max(float(z_q @ z_q) - float(y_q @ y_q), 0.0))
+        pearson_bound = np.minimum(self._projections @ y_q + self._residuals * r_q, 1.0)
+        bounds = (
+            cosine_weight * a_q * self._a
+            + (cosine_weight * b_q * self._b + (1 - cosine_weight)) * pearson_bound
+        )
+        order = np.argsort(-bounds, kind="stable")
+        if max_candidates is not None:
+            order = order[:max(max_candidates, top_k)]
+
+        best_rows = np.zeros(0, dtype=np.intp)
+        best_scores = np.zeros(0)
+        z_q32 = z_q.astype(np.float32)
+        for start in range(0, len(order), RERANK_CHUNK):
+            rows = order[start:start + RERANK_CHUNK]
+            combined, _, _ = self._exact_scores(rows, a_q, b_q, z_q32, cosine_weight)
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, combined])
+            keep = np.argsort(-best_scores, kind="stable")[:top_k]
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+            next_start = start + RERANK_CHUNK
+            if (
+                len(best_scores) == top_k
+                and next_start < len(order)
+                and best_scores[-1] >= bounds[order[next_start]]
+            ):
+                break
+
+        combined, cosine, pearson = self._exact_scores(best_rows, a_q, b_q, z_q32, cosine_weight)
+        return [
+            {
+                "substance": self.names[row],
+                "score": float(score),
+                "cosineScore": float(cos),
+                "pearsonScore": float(pear),
+            }
+            for row, score, cos, pear in zip(best_rows, combined, cosine, pearson)
+        ]
+
+    def identify_exhaustive(self, query, top_k: int = 5, cosine_weight: float = 0.5) -> List[Dict]:
+        """Reference implementation scoring every library entry (same output as identify)."""
+        if len(self) == 0 or top_k <= 0:
+            return []
+        a_q, b_q, z_q = _normalize(np.asarray(query, dtype=np.float64))
+        rows = np.arange(len(self))
+        combined, cosine, pearson = self._exact_scores(
+            rows, float(a_q[0]), float(b_q[0]), z_q[0].astype(np.float32), cosine_weight
+        )
+        keep = np.argsort(-combined, kind="stable")[:top_k]
+        return [
+            {
+                "substance": self.names[row],
+                "score": float(combined[row]),
+                "cosineScore": float(cosine[row]),
+                "pearsonScore": float(pearson[row]),
+            }
+            for row in keep
+        ]
+
+
+def benchmark(
+    index: LibraryIndex,
+    queries: np.ndarray,
+    top_k: int = 5,
+    cosine_weight: float = 0.5,
+    max_candidates: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    Measure recall and speed of the index against exhaustive scoring.
+
+    Returns:
+        Dict with recall (fraction of exhaustive top-K found), mean query times
+        in milliseconds and the speedup
+    """
+    hits = 0
+    indexed_time = 0.0
+    exhaustive_time = 0.0
+
+    for query in queries:
+        start = time.perf_counter()
+        expected = index.identify_exhaustive(query, top_k, cosine_weight)
+        exhaustive_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = index.identify(query, top_k, cosine_weight, max_candidates=max_candidates)
+        indexed_time += time.perf_counter() - start
+
+        hits += len({m["substance"] for m in expected} & {m["substance"] for m in found})
+
+    n = max(len(queries), 1)
+    return {
+        "recall": hits / max(n * min(top_k, len(index)), 1),
+        "exhaustive_ms": exhaustive_time / n * 1000,
+        "indexed_ms": indexed_time / n * 1000,
+        "speedup": exhaustive_time / indexed_time if indexed_time > 0 else float("inf"),
+    }
+
+
+# Loaded indexes, keyed by library path (shared across requests)
+_indexes: Dict[Path, tuple] = {}
+_building: Dict[Path, tuple] = {}  # library path -> signature being built
+_indexes_lock = threading.Lock()
+
+
+def _build_in_background(library_path: Path, index_path: Path, signature: tuple) -> None:
+    """Build (or load) the index off the request path and publish it."""
+    index = None
+    try:
+        index = LibraryIndex.load_or_build(library_path, index_path)
+    except Exception:
+        logger.exception("Failed to build library index")
+    with _indexes_lock:
+        if index is not None:
+            _indexes[library_path] = (signature, index)
+        if _building.get(library_path) == signature:
+            del _building[library_path]
+
+
+def get_index(library_path: Path, index_path: Path) -> LibraryIndex:
+    """
+    Get the index for a library file, reloading it when the file changes.
+
+    A persisted index for the current library is loaded directly. Otherwise
+    it is built in a background thread (building a large library takes
+    seconds and a lot of memory; it can also be built ahead of time with the
+    CLI) and IndexNotReady is raised until it is available.
+
+    Raises:
+        IndexNotReady: While the index is being built
+    """
+    library_path = Path(library_path)
+    index_path = Path(index_path)
+    stat = library_path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _indexes_lock:
+        cached = _indexes.get(library_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if _building.get(library_path) == signature:
+            raise IndexNotReady(f"Building library index for {library_path.name}")
+
+        if index_path.exists():
+            try:
+                index = LibraryIndex.load(index_path)
+                if index.digest == hashlib.sha256(library_path.read_bytes()).hexdigest():
+                    _indexes[library_path] = (signature, index)
+                    return index
+            except Exception as e:
+                logger.warning(f"Failed to load library index: {e}")
+
+        _building[library_path] = signature
+        threading.Thread(
+            target=_build_in_background,
+            args=(library_path, index_path, signature),
+            name="library-index",
+            daemon=True,
+        ).start()
+    raise IndexNotReady(f"Building library index for {library_path.name}")
+
+
+def main():
+    """Build the index for a library and report recall/speed trade-offs."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("library", type=Path, help="Path to library.json")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX_PATH, help="Where to persist the index")
+    parser.add_argument("--components", type=int, default=DEFAULT_COMPONENTS)
+    parser.add_argument("--queries", type=int, default=100, help="Number of noisy library spectra to query")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    index = LibraryIndex.load_or_build(args.library, args.index, n_components=args.components)
+
+    # Queries: library spectra with added noise, as a stand-in for measurements
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+    library = json.loads(args.library.read_text())
+    data = np.array([library["substances"][i]["data"] for i in rows], dtype=np.float64)
+    queries = data + rng.normal(0, 0.05 * data.std(), size=data.shape)
+
+    for max_candidates in [None, 4 * args.top_k, 16 * args.top_k, 64 * args.top_k]:
+        result = benchmark(index, queries, top_k=args.top_k, max_candidates=max_candidates)
+        label = "exact" if max_candidates is None else f"max_candidates={max_candidates}"
+        print(
+            f"{label:>22}: recall={result['recall']:.3f} "
+            f"exhaustive={result['exhaustive_ms']:.2f} ms indexed={result['indexed_ms']:.2f} ms "
+            f"speedup={result['speedup']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-request peak memory measurement using tracemalloc.
+
+Enable with KAT_TRACE_MEMORY=1 (all capture requests), or with ?trace_memory=1
+on a single request when the app runs in debug mode. tracemalloc slows
+allocations down, so it is only running while at least one traced request is
+in flight.
+
+It traces the whole process and has a single peak counter, which is only
+reset when no other traced request is in flight. Concurrent traced requests
+therefore never under-report, but each one's peak includes the others'
+allocations (and any peak reached since the earliest of them started).
+"""
+
+import logging
+import threading
+import tracemalloc
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_active = 0
+
+
+class PeakMemory:
+    """
+    Measure peak Python heap growth between start() and stop().
+
+    Example:
+        >>> tracker = PeakMemory("capture")
+        >>> tracker.start()
+        >>> ...
+        >>> peak_bytes = tracker.stop()
+    """
+
+    def __init__(self, label: str) -> None:
+        self._label = label
+        self._baseline = 0
+        self._running = False
+
+    def start(self) -> None:
+        """Start tracing (if needed); the peak is reset if no other trace is running."""
+        global _active
+
+        with _lock:
+            if _active == 0:
+                tracemalloc.start()
+                tracemalloc.reset_peak()
+            _active += 1
+            self._baseline = tracemalloc.get_traced_memory()[0]
+            self._running = True
+
+    def stop(self) -> Optional[int]:
+        """
+        Stop measuring and log the peak.
+
+        Returns:
+            Peak bytes allocated above the baseline, or None if not running
+        """
+        global _active
+
+        with _lock:
+            if not self._running:
+                return None
+            self._running = False
+
+            peak = max(0, tracemalloc.get_traced_memory()[1] - self._baseline)
+            _active -= 1
+            if _active == 0:
+                tracemalloc.stop()
+
+        logger.info("Peak memory for %s: %.2f MB", self._label, peak / (1024 * 1024))
+        return peak
@@ -0,0 +1,439 @@
+"""Spectrum processing pipeline for captured photos.
+
+Turns JPEG bytes into the extracted spectrum, CSV and preprocessed
+1301-point vector used for browser identification. Shared by the capture
+endpoint and batch reprocessing; heavy dependencies (cv2, ramanspy, kat)
+are imported lazily so the server can start without them.
+"""
+
+import importlib
+import io
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .roi import Roi, embed_in_full_frame
+
+logger = logging.getLogger(__name__)
+
+# Modules imported by warm_up(), in dependency order
+_WARM_UP_MODULES = [
+    "numpy",
+    "cv2",
+    "matplotlib",
+    "ramanspy",
+    "kat.acquisition.image_processing",
+    "kat.ml.common.preprocessing",
+    "kat.webapp.utils.plotting",
+]
+
+_ready = threading.Event()
+_init_error: Optional[str] = None
+
+# Target axis for browser identification (500-1800 cm-1, 1 cm-1 step)
+TARGET_AXIS_MIN = 500.0
+TARGET_AXIS_MAX = 1800.0
+TARGET_AXIS_STEP = 1.0
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Import the processing stack ahead of the first capture.
+
+    Meant to run in a background thread at startup.
+
+    Returns:
+        Mapping of module name to import duration in seconds (startup profile)
+    """
+    global _init_error
+
+    profile = {}
+    try:
+        for name in _WARM_UP_MODULES:
+            start = time.perf_counter()
+            importlib.import_module(name)
+            profile[f"import {name}"] = time.perf_counter() - start
+            if name == "matplotlib":
+                import matplotlib
+                matplotlib.use('Agg')  # Non-interactive backend
+
+        start = time.perf_counter()
+        get_preprocessing_pipeline()
+        profile["preprocessing pipeline"] = time.perf_counter() - start
+
+        _init_error = None
+        _ready.set()
+    except Exception as e:
+        logger.error("Processing initialization failed: %s", e)
+        _init_error = str(e)
+    return profile
+
+
+def is_ready() -> bool:
+    """Check if the processing stack has been imported."""
+    return _ready.is_set()
+
+
+def init_error() -> Optional[str]:
+    """Get the processing initialization error, if any."""
+    return _init_error
+
+
+def calibration_files(data_dir: Path) -> tuple:
+    """Return (camera_calibration, wavelength_calibration) paths."""
+    calibration_dir = Path(data_dir) / "calibration"
+    return (
+        calibration_dir / "calib_results.npz",
+        calibration_dir / "calibration.json",
+    )
+
+
+def extract_spectrum(photo_bytes: bytes, settings: Dict[str, Any], data_dir: Path, roi: Optional[Roi] = None):
+    """
+    Decode a JPEG and extract its calibrated spectrum.
+
+    Args:
+        photo_bytes: JPEG image data
+        settings: Capture settings (laser_auto_detect, laser_wavelength)
+        data_dir: Directory containing calibration/
+        roi: Acquisition ROI; photos cropped to it are placed back in the
+            full frame so the calibration applies unchanged
+
+    Returns:
+        Extracted spectrum, or None if calibration files are missing
+
+    Raises:
+        ValueError: If the image can't be decoded or doesn't match the ROI
+    """
+    import cv2
+    import numpy as np
+    from kat.acquisition.image_processing import extract_spectrum_calibrated
+
+    camera_cal, wavelength_cal = calibration_files(data_dir)
+    if not (camera_cal.exists() and wavelength_cal.exists()):
+        return None
+
+    # Decode JPEG bytes to numpy array
+    nparr = np.frombuffer(photo_bytes, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image")
+    if roi is not None:
+        image = embed_in_full_frame(image, roi)
+
+    # Determine laser wavelength (auto-detect or manual)
+    laser_nm = None  # Auto-detect
+    if not settings.get("laser_auto_detect", True):
+        laser_nm = settings.get("laser_wavelength", 785.0)
+
+    return extract_spectrum_calibrated(
+        image=image,
+        calibration_file=str(wavelength_cal),
+        camera_calibration_file=str(camera_cal),
+        laser_wavelength_nm=laser_nm,
+    )
+
+
+def iter_spectrum_csv(spectrum, chunk_lines: int = 256) -> Iterator[str]:
+    """Format spectrum as a wavenumber,intensity CSV, yielding chunks of lines."""
+    yield "wavenumber,intensity"
+    axis = spectrum.spectrum.spectral_axis
+    data = spectrum.spectrum.spectral_data.reshape(-1)
+    for start in range(0, len(axis), chunk_lines):
+        yield "".join(
+            f"\n{wn},{intensity}"
+            for wn, intensity in zip(axis[start:start + chunk_lines], data[start:start + chunk_lines])
+        )
+
+
+def spectrum_csv(spectrum) -> str:
+    """Format spectrum as a wavenumber,intensity CSV string."""
+    return "".join(iter_spectrum_csv(spectrum))
+
+
+class ResampleOperator:
+    """
+    Precomputed linear interpolation from a native spectral axis to the target axis.
+
+    Equivalent to a sparse (banded, two nonzeros per row) weight matrix W with
+    resampled = W @ intensities, stored as the left neighbour index and weight
+    of each target point. Built once per fixed native axis (see
+    resample_key()) instead of interpolating per request.
+    """
+
+    def __init__(self, native_axis, target_axis) -> None:
+        import numpy as np
+
+        native_axis = np.asarray(native_axis, dtype=np.float64)
+        target_axis = np.asarray(target_axis, dtype=np.float64)
+
+        # Interpolation needs an increasing axis; remember the permutation
+        self._order = np.argsort(native_axis, kind="stable")
+        axis = native_axis[self._order]
+
+        # Left neighbour of each target point; targets outside the axis are
+        # clamped to the edge values (same as np.interp)
+        clamped = np.clip(target_axis, axis[0], axis[-1])
+        left = np.clip(np.searchsorted(axis, clamped, side="right") - 1, 0, len(axis) - 2)
+        span = axis[left + 1] - axis[left]
+        weight = np.divide(clamped - axis[left], span, out=np.zeros_like(clamped), where=span > 0)
+
+        self.native_axis = native_axis
+        self.target_axis = target_axis
+        self._left = left
+        self._right_weight = weight
+        self._left_weight = 1.0 - weight
+
+    def apply(self, intensities):
+        """Resample intensities (native axis order) to the target axis."""
+        import numpy as np
+
+        data = np.asarray(intensities, dtype=np.float64).reshape(-1)[self._order]
+        return self._left_weight * data[self._left] + self._right_weight * data[self._left + 1]
+
+
+# Resample operators keyed by resample_key(), as (native axis, operator);
+# operator is None if it disagreed with the reference path for that axis
+_operators: Dict[tuple, tuple] = {}
+_operators_lock = threading.Lock()
+_MAX_OPERATORS = 8
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def target_axis():
+    """The 1301-point target axis used for browser identification."""
+    import numpy as np
+
+    return np.arange(TARGET_AXIS_MIN, TARGET_AXIS_MAX + TARGET_AXIS_STEP, TARGET_AXIS_STEP)
+
+
+def get_preprocessing_pipeline():
+    """Get the standard preprocessing pipeline (instantiated once and reused)."""
+    global _pipeline
+
+    with _pipeline_lock:
+        if _pipeline is None:
+            from kat.ml.common.preprocessing import get_standard_preprocessing_pipeline
+            _pipeline = get_standard_preprocessing_pipeline()
+        return _pipeline
+
+
+def resample_key(settings: Dict[str, Any], data_dir: Path) -> Optional[tuple]:
+    """
+    Key identifying a fixed native spectral axis, or None if it varies.
+
+    The axis is fixed by the calibration files and the laser wavelength. With
+    laser_auto_detect the wavelength is detected per photo, so there is no
+    fixed axis and the reference resampling is used.
+    """
+    if settings.get("laser_auto_detect", True):
+        return None
+
+    key = [float(settings.get("laser_wavelength", 785.0))]
+    for path in calibration_files(data_dir):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        key += [str(path), stat.st_mtime_ns, stat.st_size]
+    return tuple(key)
+
+
+def _resample_reference(spectrum, axis):
+    """Resample with the spectrum's own implementation (reference path)."""
+    return spectrum.resample_to_axis(axis).spectrum.spectral_data.reshape(-1)
+
+
+def resample_to_target(spectrum, key: Optional[tuple] = None):
+    """
+    Resample a spectrum to the target axis.
+
+    With a key from resample_key(), uses the cached ResampleOperator for that
+    calibration and laser wavelength. When an operator is first built it is
+    checked numerically against resample_to_axis() on the same spectrum and
+    only used if they agree. Without a key, or if the spectrum's axis differs
+    from the one the operator was built for, resample_to_axis() is used.
+    """
+    import numpy as np
+
+    axis = target_axis()
+    if key is None:
+        return _resample_reference(spectrum, axis)
+
+    native_axis = np.asarray(spectrum.spectrum.spectral_axis, dtype=np.float64)
+    intensities = spectrum.spectrum.spectral_data.reshape(-1)
+
+    with _operators_lock:
+        cached = _operators.get(key)
+    if cached is not None and np.array_equal(cached[0], native_axis):
+        operator = cached[1]
+        if operator is None:
+            return _resample_reference(spectrum, axis)
+        return operator.apply(intensities)
+
+    # First spectrum for this key: build and verify against the reference path
+    reference = _resample_reference(spectrum, axis)
+    operator = ResampleOperator(native_axis, axis)
+    fused = operator.apply(intensities)
+
+    scale = max(float(np.max(np.abs(reference))), 1e-12) if reference.size else 1.0
+    max_error = float(np.max(np.abs(fused - reference))) / scale if reference.size == fused.size else np.inf
+    if max_error <= 1e-6:
+        logger.info("Resample operator built for %d-point axis (max rel. error %.2e)", len(native_axis), max_error)
+    else:
+        logger.warning(
+            "Resample operator disagrees with resample_to_axis (max rel. error %.2e), using reference path",
+            max_error,
+        )
+        operator = None
+
+    with _operators_lock:
+        _operators.pop(key, None)
+        if len(_operators) >= _MAX_OPERATORS:
+            _operators.pop(next(iter(_operators)))
+        _operators[key] = (native_axis, operator)
+    return reference
+
+
+def preprocess_spectrum(spectrum, key: Optional[tuple] = None) -> list:
+    """
+    Resample to the 1301-point target axis and apply standard preprocessing.
+
+    Args:
+        spectrum: Extracted spectrum
+        key: resample_key() for the capture settings (None = reference resampling)
+    """
+    import numpy as np
+    import ramanspy as rp
+
+    resampled = resample_to_target(spectrum, key)
+    spec_obj = rp.Spectrum(resampled, target_axis())
+    processed = get_preprocessing_pipeline().apply(spec_obj)
+    return processed.spectral_data.flatten().astype(np.float32).tolist()
+
+
+def render_summary_plot(spectrum, photo_bytes: bytes) -> bytes:
+    """Render the summary plot for a spectrum as PNG bytes."""
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend
+    import matplotlib.pyplot as plt
+    from kat.webapp.utils.plotting import create_summary_plot
+
+    # Create a temporary file-like object for the photo
+    photo_buffer = io.BytesIO(photo_bytes)
+    summary_fig = create_summary_plot(
+        spectrum=spectrum,
+        photo_path=photo_buffer,
+    )
+    summary_buffer = io.BytesIO()
+    summary_fig.savefig(summary_buffer, format='png', dpi=100, bbox_inches="tight")
+    plt.close(summary_fig)
+    return summary_buffer.getvalue()
+
+
+def process_photo(
+    photo_bytes: bytes,
+    settings: Dict[str, Any],
+    data_dir: Path,
+    summary_plot: bool = True,
+    roi: Optional[Roi] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full processing pipeline on a photo.
+
+    Optional steps (preprocessing, summary plot) log a warning and leave their
+    field as None on failure, matching the capture endpoint behaviour.
+    Extraction errors propagate to the caller.
+
+    Returns:
+        Dict with spectrum, preprocessed_spectrum, csv, summary_plot (PNG bytes),
+        laser_wavelength and detection_mode; all None if uncalibrated.
+    """
+    result: Dict[str, Optional[Any]] = {
+        "spectrum": None,
+        "preprocessed_spectrum": None,
+        "csv": None,
+        "summary_plot": None,
+        "laser_wavelength": None,
+        "detection_mode": None,
+    }
+
+    spectrum = extract_spectrum(photo_bytes, settings, data_dir, roi=roi)
+    if spectrum is None:
+        return result
+
+    # Convert spectrum to JSON
+    result["spectrum"] = spectrum.to_json_dict()
+
+    # Get laser detection info
+    acq_params = spectrum.acquisition_parameters or {}
+    result["laser_wavelength"] = acq_params.get("laser_wavelength_nm")
+    result["detection_mode"] = acq_params.get("laser_detection_mode")
+
+    result["csv"] = spectrum_csv(spectrum)
+
+    # Preprocess spectrum for browser identification
+    try:
+        result["preprocessed_spectrum"] = preprocess_spectrum(spectrum, resample_key(settings, data_dir))
+    except Exception as e:
+        logger.warning(f"Spectrum preprocessing failed: {e}")
+
+    if summary_plot:
+        try:
+            result["summary_plot"] = render_summary_plot(spectrum, photo_bytes)
+        except Exception as e:
+            logger.warning(f"Summary plot generation failed: {e}")
+
+    return result
+
+
+def process_pool(max_workers: int):
+    """
+    Create a process pool for reprocess_photo().
+
+    Workers are started from a forkserver rather than forked from the server,
+    which may have libcamera threads and camera file descriptors open. The
+    forkserver preloads the processing stack once, so workers start warm.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=max_workers)
+
+    context = multiprocessing.get_context("forkserver")
+    # Only takes effect before the forkserver starts; missing modules are skipped
+    context.set_forkserver_preload([__name__] + _WARM_UP_MODULES)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+def reprocess_photo(
+    photo_bytes: bytes,
+    settings: Dict[str, Any],
+    data_dir: str,
+    roi: Optional[Roi] = None,
+) -> Dict[str, Any]:
+    """
+    Reprocess a stored photo with the current calibration (worker entry point).
+
+    Runs in a process pool, so it must stay a picklable module-level function
+    and never raise: errors are reported in the returned dict.
+    """
+    result: Dict[str, Any] = {"success": False, "error": None}
+    try:
+        processed = process_photo(photo_bytes, settings, Path(data_dir), summary_plot=False, roi=roi)
+        del processed["summary_plot"]
+        result.update(processed)
+        if processed["spectrum"] is None:
+            result["error"] = "Calibration files not found"
+        else:
+            result["success"] = True
+    except ImportError as e:
+        result["error"] = f"Spectrum extraction not available: {e}"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
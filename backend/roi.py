@@ -0,0 +1,223 @@
+"""Region of interest (ROI) around the spectral band.
+
+Only a narrow band of the sensor containing the dispersed spectrum is used by
+spectrum extraction. Cropping acquisition to that band reduces the bytes per
+frame and the JPEG encode/decode time roughly in proportion to its area.
+
+The band is read from the wavelength calibration (calibration.json), from
+the first of these that is present (coordinates in full-frame pixels):
+
+    "roi": {"x": ..., "y": ..., "width": ..., "height": ...}
+    "spectral_band": {"y_min": ..., "y_max": ..., "x_min": ..., "x_max": ...}
+    top-level "y_min"/"y_max" (+ optional "x_min"/"x_max")
+
+Missing x bounds default to the full frame width. Cropped images are pasted
+back into a full-frame canvas before extraction, so the calibrated
+pixel-to-wavelength mapping (and camera calibration) apply unchanged.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Extra rows/columns kept around the calibrated band
+DEFAULT_MARGIN = 16
+
+
+class Roi(NamedTuple):
+    """Crop rectangle in full-frame pixels, with the full frame size it refers to."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+    full_width: int
+    full_height: int
+
+    def normalized(self) -> Tuple[float, float, float, float]:
+        """ROI as fractions of the full frame (rpicam --roi format)."""
+        return (
+            self.x / self.full_width,
+            self.y / self.full_height,
+            self.width / self.full_width,
+            self.height / self.full_height,
+        )
+
+    def to_json_dict(self) -> Dict[str, int]:
+        return self._asdict()
+
+    @classmethod
+    def from_json_dict(cls, data: Dict) -> "Roi":
+        """
+        Rebuild an ROI from to_json_dict() output (e.g. stored with a capture).
+
+        Raises:
+            ValueError: If fields are missing or the crop is outside the frame
+        """
+        try:
+            roi = cls(**{field: int(data[field]) for field in cls._fields})
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid ROI: {data!r}") from e
+        if (
+            roi.width <= 0 or roi.height <= 0 or roi.x < 0 or roi.y < 0
+            or roi.x + roi.width > roi.full_width or roi.y + roi.height > roi.full_height
+        ):
+            raise ValueError(f"ROI outside the frame: {roi}")
+        return roi
+
+
+def _band_from_calibration(calibration: Dict) -> Optional[Tuple[Optional[float], float, Optional[float], float]]:
+    """Extract (x_min, y_min, x_max, y_max) from calibration data, or None."""
+    roi = calibration.get("roi")
+    if isinstance(roi, dict) and {"x", "y", "width", "height"} <= roi.keys():
+        return (roi["x"], roi["y"], roi["x"] + roi["width"], roi["y"] + roi["height"])
+
+    for band in (calibration.get("spectral_band"), calibration):
+        if isinstance(band, dict) and "y_min" in band and "y_max" in band:
+            return (band.get("x_min"), band["y_min"], band.get("x_max"), band["y_max"])
+
+    return None
+
+
+def compute_roi(
+    calibration: Dict,
+    full_size: Tuple[int, int],
+    margin: int = DEFAULT_MARGIN,
+) -> Optional[Roi]:
+    """
+    Compute the acquisition ROI for a calibration.
+
+    Args:
+        calibration: Parsed calibration.json
+        full_size: (width, height) of a full-frame capture
+        margin: Pixels added on each side of the band
+
+    Returns:
+        ROI aligned to even pixels (required by the ISP), or None if the
+        calibration does not describe the spectral band
+    """
+    band = _band_from_calibration(calibration)
+    if band is None:
+        return None
+
+    full_width, full_height = full_size
+    x_min, y_min, x_max, y_max = band
+    if x_min is None:
+        x_min = 0
+    if x_max is None:
+        x_max = full_width
+
+    x0 = max(0, int(x_min) - margin) & ~1
+    y0 = max(0, int(y_min) - margin) & ~1
+    x1 = min(full_width, int(x_max + 0.999) + margin)
+    y1 = min(full_height, int(y_max + 0.999) + margin)
+    width = (x1 - x0 + 1) & ~1
+    height = (y1 - y0 + 1) & ~1
+    width = min(width, full_width - x0)
+    height = min(height, full_height - y0)
+
+    if width <= 0 or height <= 0:
+        logger.warning("Spectral band %s is outside the %dx%d frame", band, full_width, full_height)
+        return None
+    return Roi(x0, y0, width, height, full_width, full_height)
+
+
+# Cached ROI per calibration file, invalidated when the file changes
+_cache: Dict[Tuple[Path, Tuple[int, int], int], Tuple[Tuple[int, int], Optional[Roi]]] = {}
+# Whether each calibration file describes the band, likewise
+_band_cache: Dict[Path, Tuple[Tuple[int, int], bool]] = {}
+_cache_lock = threading.Lock()
+
+
+def has_spectral_band(calibration_file: Path) -> bool:
+    """Check whether a calibration file describes the spectral band (cached until the file changes)."""
+    calibration_file = Path(calibration_file)
+    try:
+        stat = calibration_file.stat()
+    except OSError:
+        return False
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _band_cache.get(calibration_file)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        try:
+            available = _band_from_calibration(json.loads(calibration_file.read_text())) is not None
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Failed to read spectral band from calibration: {e}")
+            available = False
+        if not available:
+            logger.warning("No spectral band in calibration, cropping is not available")
+        _band_cache[calibration_file] = (signature, available)
+        return available
+
+
+def load_roi(
+    calibration_file: Path,
+    full_size: Optional[Tuple[int, int]],
+    margin: int = DEFAULT_MARGIN,
+) -> Optional[Roi]:
+    """
+    Load the ROI for a calibration file (cached until the file changes).
+
+    Returns None if the file or full frame size is unknown, or if the
+    calibration does not describe the spectral band.
+    """
+    calibration_file = Path(calibration_file)
+    if full_size is None or not calibration_file.exists():
+        return None
+
+    stat = calibration_file.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = (calibration_file, tuple(full_size), margin)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        try:
+            calibration = json.loads(calibration_file.read_text())
+            roi = compute_roi(calibration, full_size, margin)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Failed to read spectral band from calibration: {e}")
+            roi = None
+
+        if roi is None:
+            logger.warning("No spectral band in calibration, using full frame")
+        else:
+            logger.info("Spectral band ROI: %s", roi)
+        _cache[key] = (signature, roi)
+        return roi
+
+
+def embed_in_full_frame(image, roi: Roi):
+    """
+    Paste a cropped image into a zero full-frame canvas at the ROI position.
+
+    Full-frame images are returned unchanged.
+
+    Raises:
+        ValueError: If the image is neither ROI-sized nor full-frame (the
+            calibration would not apply to it)
+    """
+    import numpy as np
+
+    size = image.shape[:2]
+    if size == (roi.full_height, roi.full_width):
+        return image
+    if size != (roi.height, roi.width):
+        raise ValueError(
+            f"Image size {size[1]}x{size[0]} matches neither the ROI "
+            f"({roi.width}x{roi.height}) nor the full frame ({roi.full_width}x{roi.full_height})"
+        )
+
+    canvas = np.zeros((roi.full_height, roi.full_width) + image.shape[2:], dtype=image.dtype)
+    canvas[roi.y:roi.y + roi.height, roi.x:roi.x + roi.width] = image
+    return canvas
@@ -5,12 +5,13 @@ Browser stores all session data and files in IndexedDB.
 """
 
 import base64
-import io
 import json
 import logging
+import os
+import struct
 import time
+from concurrent.futures import FIRST_COMPLETED, wait
 from datetime import datetime
-from pathlib import Path
 from typing import Generator
 
 from flask import Blueprint, Response, current_app, jsonify, request
@@ -19,6 +20,13 @@ logger = logging.getLogger(__name__)
 
 api_bp = Blueprint("api", __name__)
 
+# WebSocket support is optional (flask-sock); the MJPEG stream is always available
+try:
+    from flask_sock import Sock
+    sock = Sock()
+except ImportError:
+    sock = None
+
 
 # ============================================================================
 # Settings Endpoints (ephemeral - for current capture session only)
@@ -45,9 +53,10 @@ def update_settings():
             except (ValueError, TypeError):
                 return jsonify({"error": f"Invalid value for {key}"}), 400
 
-    # Handle boolean field
-    if "laser_auto_detect" in data:
-        settings["laser_auto_detect"] = bool(data["laser_auto_detect"])
+    # Handle boolean fields
+    for key in ["laser_auto_detect", "roi_enabled"]:
+        if key in data:
+            settings[key] = bool(data[key])
 
     current_app.config["settings"] = settings
     return jsonify(settings)
@@ -56,6 +65,8 @@ def update_settings():
 @api_bp.route("/calibration", methods=["GET"])
 def get_calibration_status():
     """Check calibration file status."""
+    from .roi import has_spectral_band
+
     data_dir = current_app.config["DATA_DIR"]
     calibration_dir = data_dir / "calibration"
 
@@ -65,10 +76,31 @@ def get_calibration_status():
     return jsonify({
         "camera_calibration": camera_cal.exists(),
         "wavelength_calibration": wavelength_cal.exists(),
+        # Without a band, cropping (/preview/roi) has no effect
+        "spectral_band": has_spectral_band(wavelength_cal),
         "calibration_dir": str(calibration_dir),
     })
 
 
+def _apply_roi(camera, settings, data_dir):
+    """Set the camera ROI from the calibrated spectral band (or full frame)."""
+    roi = _current_roi(camera, settings, data_dir)
+    camera.set_roi(roi)
+    return roi
+
+
+def _current_roi(camera, settings, data_dir):
+    """Get the acquisition ROI for the current settings, or None for full frame."""
+    if not settings.get("roi_enabled", True):
+        return None
+
+    from .processing import calibration_files
+    from .roi import load_roi
+
+    _, wavelength_cal = calibration_files(data_dir)
+    return load_roi(wavelength_cal, camera.full_frame_size())
+
+
 # ============================================================================
 # Preview Endpoints
 # ============================================================================
@@ -102,15 +134,94 @@ def preview_stream():
     )
 
 
+# Binary preview frame header: sequence number, publish timestamp (unix seconds
+# when the encoded frame became available on the server, i.e. after capture and
+# JPEG encoding), exposure (microseconds); followed by the raw JPEG
+PREVIEW_FRAME_HEADER = struct.Struct("!IdI")
+
+# Maximum unacknowledged frames a client may request
+PREVIEW_MAX_WINDOW = 8
+
+
+def preview_ws(ws):
+    """
+    WebSocket preview with client-acknowledged flow control.
+
+    Query: window (unacknowledged frames allowed in flight, default 1).
+    Each binary message is PREVIEW_FRAME_HEADER + JPEG. The client
+    acknowledges frames with a text message {"ack": seq}. A new frame is only
+    sent while fewer than ``window`` frames are unacknowledged, and it is
+    always the latest one, so slow clients skip frames instead of queueing
+    stale ones. Publish-to-ack latency (network and client decode, excluding
+    capture and encode time) is reported in /preview/status.
+    """
+    camera = current_app.config["camera"]
+    latencies = current_app.config["preview_ws_latency"]
+
+    try:
+        window = min(max(int(request.args.get("window", 1)), 1), PREVIEW_MAX_WINDOW)
+    except ValueError:
+        window = 1
+
+    in_flight = {}  # seq -> publish timestamp
+    seq = 0
+    last_sent = 0.0  # publish timestamp of the last frame sent
+
+    while camera.is_streaming():
+        # Wait for acknowledgements while the window is full
+        while len(in_flight) >= window:
+            message = ws.receive(timeout=1.0)
+            if message is None:
+                if not camera.is_streaming():
+                    break
+                continue
+            try:
+                acked = int(json.loads(message)["ack"])
+            except (ValueError, TypeError, KeyError):
+                continue
+            publish_time = in_flight.pop(acked, None)
+            # Acks are cumulative: anything older is no longer in flight
+            for stale in [s for s in in_flight if s < acked]:
+                del in_flight[stale]
+            if publish_time:
+                latencies.append(time.time() - publish_time)
+
+        info = camera.get_frame_info()
+        if not info:
+            # Brief sleep to prevent CPU spin when no frame is available
+            time.sleep(0.01)
+            continue
+
+        frame, publish_time, exposure_us = info
+        if publish_time <= last_sent:
+            # No new frame yet (the camera returns the previous one on timeout)
+            continue
+        last_sent = publish_time
+        seq = (seq + 1) & 0xFFFFFFFF
+        ws.send(PREVIEW_FRAME_HEADER.pack(seq, publish_time, exposure_us) + frame)
+        in_flight[seq] = publish_time
+
+    ws.send(json.dumps({"type": "stopped"}))
+
+
+if sock is not None:
+    sock.route("/preview/ws", bp=api_bp)(preview_ws)
+
+
 @api_bp.route("/preview/start", methods=["POST"])
 def start_preview():
     """Start camera preview."""
     logger.info("Preview start requested")
     camera = current_app.config["camera"]
 
+    if current_app.config["timelapse"].is_acquiring():
+        return jsonify({"status": "error", "message": "Time-lapse in progress"}), 409
+
     # Note: start_preview() handles the "already streaming" case internally under lock,
     # so we don't check is_streaming() here to avoid a TOCTOU race condition.
     try:
+        if not camera.is_streaming():
+            _apply_roi(camera, current_app.config["settings"], current_app.config["DATA_DIR"])
         camera.start_preview(
             width=640,
             height=480,
@@ -124,6 +235,45 @@ def start_preview():
     return jsonify({"status": "ok", "message": "Preview started"})
 
 
+@api_bp.route("/preview/roi", methods=["POST"])
+def set_preview_roi():
+    """
+    Toggle cropping to the spectral band.
+
+    Body: {"enabled": bool}. Disabling brings back the full-frame view for
+    alignment. A running preview is restarted with the new crop; the setting
+    also applies to subsequent captures.
+    """
+    data = request.get_json(silent=True) or {}
+    camera = current_app.config["camera"]
+    settings = current_app.config["settings"]
+
+    if "enabled" not in data:
+        return jsonify({"status": "error", "message": "Missing 'enabled'"}), 400
+    settings["roi_enabled"] = bool(data["enabled"])
+
+    if current_app.config["timelapse"].is_acquiring():
+        # Applied when the time-lapse is over
+        return jsonify({"status": "ok", "roi_enabled": settings["roi_enabled"], "roi": None})
+
+    try:
+        was_streaming = camera.is_streaming()
+        if was_streaming:
+            camera.stop_preview()
+        roi = _apply_roi(camera, settings, current_app.config["DATA_DIR"])
+        if was_streaming:
+            camera.start_preview(width=640, height=480, framerate=15)
+    except Exception as e:
+        logger.error("Failed to apply ROI: %s", e, exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    return jsonify({
+        "status": "ok",
+        "roi_enabled": settings["roi_enabled"],
+        "roi": roi.to_json_dict() if roi else None,
+    })
+
+
 @api_bp.route("/preview/stop", methods=["POST"])
 def stop_preview():
     """Stop camera preview."""
@@ -138,7 +288,12 @@ def stop_preview():
 @api_bp.route("/preview/status", methods=["GET"])
 def preview_status():
     """Get preview streaming status."""
+    from .processing import calibration_files
+    from .roi import has_spectral_band
+
     camera = current_app.config["camera"]
+    latencies = list(current_app.config["preview_ws_latency"])
+    roi = camera.get_roi()
     frame_count, fps, time_since, exposure_us = camera.get_stats()
     is_streaming = camera.is_streaming()
 
@@ -153,14 +308,165 @@ def preview_status():
         "fps": round(fps, 1),
         "time_since_frame": round(time_since, 2),
         "exposure_us": exposure_us,
+        "roi": roi.to_json_dict() if roi else None,
+        "spectral_band": has_spectral_band(calibration_files(current_app.config["DATA_DIR"])[1]),
+        "ws_publish_to_ack_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
     })
 
 
+# ============================================================================
+# Identification Endpoint
+# ============================================================================
+
+
+@api_bp.route("/identify", methods=["POST"])
+def identify():
+    """
+    Identify a preprocessed spectrum against the reference library.
+
+    Uses the persisted library index, returning the same top-K as the
+    browser's exhaustive search. Returns 503 while the index for a new
+    library version is built in the background.
+    Body: {"spectrum": [1301 floats], "top_k": 5, "cosine_weight": 0.5}
+    """
+    data = request.get_json(silent=True) or {}
+    library_path = current_app.config["LIBRARY_PATH"]
+
+    if not library_path.exists():
+        return jsonify({"error": "Library not found"}), 404
+
+    try:
+        top_k = int(data.get("top_k", 5))
+        cosine_weight = float(data.get("cosine_weight", 0.5))
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid value for top_k or cosine_weight"}), 400
+
+    from .library_index import IndexNotReady, get_index
+
+    try:
+        index = get_index(library_path, current_app.config["LIBRARY_INDEX_PATH"])
+    except IndexNotReady as e:
+        return jsonify({"error": str(e)}), 503
+
+    try:
+        matches = index.identify(data.get("spectrum") or [], top_k=top_k, cosine_weight=cosine_weight)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"matches": matches, "version": index.version})
+
+
 # ============================================================================
 # Capture Endpoint - Returns all data inline (stateless)
 # ============================================================================
 
 
+# Base64 is encoded in chunks of this many input bytes (multiple of 3, so
+# chunks concatenate without padding)
+BASE64_CHUNK = 48 * 1024
+
+
+def _iter_base64(data) -> Generator[str, None, None]:
+    """Base64-encode data in chunks without materializing the full string."""
+    view = memoryview(data)
+    for start in range(0, len(view), BASE64_CHUNK):
+        yield base64.b64encode(view[start:start + BASE64_CHUNK]).decode("ascii")
+
+
+def _stream_capture(head, photo_bytes, settings, data_dir, roi, dumps, tracker) -> Generator[str, None, None]:
+    """
+    Encode a capture response as a JSON object, one field at a time.
+
+    Each field is processed and written as late as possible and its
+    intermediates are dropped once emitted, so peak memory stays close to the
+    photo size instead of a multiple of it. Same fields as the buffered response.
+    """
+    from .processing import (
+        extract_spectrum,
+        iter_spectrum_csv,
+        preprocess_spectrum,
+        render_summary_plot,
+        resample_key,
+    )
+
+    try:
+        yield "{" + ", ".join(f"{dumps(key)}: {dumps(value)}" for key, value in head.items())
+
+        yield ', "photo": "'
+        yield from _iter_base64(photo_bytes)
+        yield '"'
+
+        # Step 2: Extract spectrum. Everything that the buffered path treats as
+        # an extraction failure is done before emitting, so a failure still
+        # yields null fields and a complete object.
+        spectrum = None
+        try:
+            spectrum = extract_spectrum(photo_bytes, settings, data_dir, roi=roi)
+            if spectrum is not None:
+                acq_params = spectrum.acquisition_parameters or {}
+                spectrum_json = dumps(spectrum.to_json_dict())
+                laser_json = dumps(acq_params.get("laser_wavelength_nm"))
+                detection_json = dumps(acq_params.get("laser_detection_mode"))
+        except ImportError as e:
+            spectrum = None
+            logger.warning(f"Spectrum extraction not available: {e}")
+        except Exception as e:
+            spectrum = None
+            logger.error(f"Spectrum extraction failed: {e}")
+
+        if spectrum is None:
+            yield (
+                ', "spectrum": null, "laser_wavelength": null, "detection_mode": null'
+                ', "csv": null, "preprocessed_spectrum": null, "summary_plot": null'
+            )
+        else:
+            yield ', "spectrum": ' + spectrum_json
+            yield ', "laser_wavelength": ' + laser_json
+            yield ', "detection_mode": ' + detection_json
+            del spectrum_json
+
+            # CSV lines are JSON-escaped chunk by chunk (strip the quotes dumps adds)
+            yield ', "csv": "'
+            try:
+                for chunk in iter_spectrum_csv(spectrum):
+                    yield dumps(chunk)[1:-1]
+            except Exception as e:
+                logger.error(f"CSV generation failed: {e}")
+            yield '"'
+
+            # Preprocess spectrum for browser identification
+            preprocessed = None
+            try:
+                preprocessed = preprocess_spectrum(spectrum, resample_key(settings, data_dir))
+            except Exception as e:
+                logger.warning(f"Spectrum preprocessing failed: {e}")
+            yield ', "preprocessed_spectrum": ' + dumps(preprocessed)
+            del preprocessed
+
+            summary_png = None
+            try:
+                summary_png = render_summary_plot(spectrum, photo_bytes)
+            except Exception as e:
+                logger.warning(f"Summary plot generation failed: {e}")
+            del spectrum, photo_bytes
+
+            if summary_png is None:
+                yield ', "summary_plot": null'
+            else:
+                yield ', "summary_plot": "'
+                yield from _iter_base64(summary_png)
+                yield '"'
+            del summary_png
+
+        yield ', "success": true, "error": null'
+        if tracker is not None:
+            yield ', "peak_memory_bytes": ' + dumps(tracker.stop())
+        yield "}"
+    finally:
+        if tracker is not None:
+            tracker.stop()
+
+
 @api_bp.route("/capture", methods=["POST"])
 def capture():
     """
@@ -168,11 +474,27 @@ def capture():
 
     Returns JSON result with all data inline as base64 - nothing saved to disk.
     Browser is responsible for storing data in IndexedDB.
+
+    The response body is streamed and encoded field by field to bound memory
+    on the Pi. ``?stream=0`` returns the fully buffered response instead, and
+    KAT_TRACE_MEMORY=1 (or ``?trace_memory=1`` in debug mode) reports
+    per-request peak memory as ``peak_memory_bytes`` so both can be compared.
     """
     camera = current_app.config["camera"]
     settings = current_app.config["settings"]
     data_dir = current_app.config["DATA_DIR"]
 
+    if current_app.config["timelapse"].is_acquiring():
+        return jsonify({"success": False, "error": "Time-lapse in progress"}), 409
+
+    stream = request.args.get("stream", "1") != "0"
+    tracker = None
+    # Per-request tracing turns on process-wide tracemalloc, so only in debug mode
+    if current_app.config["TRACE_MEMORY"] or (current_app.debug and request.args.get("trace_memory") == "1"):
+        from .memtrace import PeakMemory
+        tracker = PeakMemory("capture" if stream else "capture (buffered)")
+        tracker.start()
+
     result = {
         "success": False,
         "timestamp": None,
@@ -183,6 +505,7 @@ def capture():
         "summary_plot": None,  # base64 PNG
         "laser_wavelength": None,
         "detection_mode": None,
+        "roi": None,  # Crop of the photo within the full frame (None = full frame)
         "error": None,
     }
 
@@ -194,89 +517,34 @@ def capture():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         result["timestamp"] = timestamp
 
+        roi = _apply_roi(camera, settings, data_dir)
+        result["roi"] = roi.to_json_dict() if roi else None
+
         # Camera now returns bytes directly
         photo_bytes = camera.capture_photo(
             shutter_us=shutter_us,
             gain=gain,
         )
+
+        if stream:
+            head = {"timestamp": result["timestamp"], "roi": result["roi"]}
+            return Response(
+                _stream_capture(
+                    head, photo_bytes, dict(settings), data_dir, roi, current_app.json.dumps, tracker
+                ),
+                mimetype="application/json",
+            )
+
         result["photo"] = base64.b64encode(photo_bytes).decode("ascii")
 
         # Step 2: Extract spectrum
-        spectrum = None
-
         try:
-            import cv2
-            import numpy as np
-            import ramanspy as rp
-            import matplotlib
-            matplotlib.use('Agg')  # Non-interactive backend
-            import matplotlib.pyplot as plt
-            from kat.acquisition.image_processing import extract_spectrum_calibrated
-            from kat.webapp.utils.plotting import create_summary_plot
-            from kat.ml.common.preprocessing import get_standard_preprocessing_pipeline
-
-            # Load calibration paths
-            calibration_dir = data_dir / "calibration"
-            camera_cal = calibration_dir / "calib_results.npz"
-            wavelength_cal = calibration_dir / "calibration.json"
-
-            if camera_cal.exists() and wavelength_cal.exists():
-                # Decode JPEG bytes to numpy array
-                nparr = np.frombuffer(photo_bytes, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                # Determine laser wavelength (auto-detect or manual)
-                laser_nm = None  # Auto-detect
-                if not settings.get("laser_auto_detect", True):
-                    laser_nm = settings.get("laser_wavelength", 785.0)
-
-                spectrum = extract_spectrum_calibrated(
-                    image=image,
-                    calibration_file=str(wavelength_cal),
-                    camera_calibration_file=str(camera_cal),
-                    laser_wavelength_nm=laser_nm,
-                )
-
-                # Convert spectrum to JSON
-                result["spectrum"] = spectrum.to_json_dict()
+            from .processing import process_photo
 
-                # Get laser detection info
-                acq_params = spectrum.acquisition_parameters or {}
-                result["laser_wavelength"] = acq_params.get("laser_wavelength_nm")
-                result["detection_mode"] = acq_params.get("laser_detection_mode")
-
-                # Generate CSV as string
-                csv_lines = ["wavenumber,intensity"]
-                for wn, intensity in zip(spectrum.spectrum.spectral_axis, spectrum.spectrum.spectral_data.flatten()):
-                    csv_lines.append(f"{wn},{intensity}")
-                result["csv"] = "\n".join(csv_lines)
-
-                # Preprocess spectrum for browser identification
-                try:
-                    target_axis = np.arange(500.0, 1801.0, 1.0)  # 1301 points
-                    resampled = spectrum.resample_to_axis(target_axis)
-                    spec_obj = rp.Spectrum(resampled.spectrum.spectral_data, target_axis)
-                    pipeline = get_standard_preprocessing_pipeline()
-                    processed = pipeline.apply(spec_obj)
-                    result["preprocessed_spectrum"] = processed.spectral_data.flatten().astype(np.float32).tolist()
-                except Exception as e:
-                    logger.warning(f"Spectrum preprocessing failed: {e}")
-
-                # Create summary plot to BytesIO
-                try:
-                    # Create a temporary file-like object for the photo
-                    photo_buffer = io.BytesIO(photo_bytes)
-                    summary_fig = create_summary_plot(
-                        spectrum=spectrum,
-                        photo_path=photo_buffer,
-                    )
-                    summary_buffer = io.BytesIO()
-                    summary_fig.savefig(summary_buffer, format='png', dpi=100, bbox_inches="tight")
-                    plt.close(summary_fig)
-                    summary_buffer.seek(0)
-                    result["summary_plot"] = base64.b64encode(summary_buffer.getvalue()).decode("ascii")
-                except Exception as e:
-                    logger.warning(f"Summary plot generation failed: {e}")
+            processed = process_photo(photo_bytes, settings, data_dir, roi=roi)
+            if processed["summary_plot"] is not None:
+                processed["summary_plot"] = base64.b64encode(processed["summary_plot"]).decode("ascii")
+            result.update(processed)
 
         except ImportError as e:
             logger.warning(f"Spectrum extraction not available: {e}")
@@ -289,4 +557,305 @@ def capture():
         logger.exception("Capture failed")
         result["error"] = str(e)
 
+    if tracker is not None:
+        # Include the final JSON encoding in the measurement
+        jsonify(result)
+        result["peak_memory_bytes"] = tracker.stop()
+
     return jsonify(result)
+
+
+# ============================================================================
+# Time-lapse Endpoints - Scheduled acquisition with bounded result buffer
+# ============================================================================
+
+
+@api_bp.route("/timelapse/start", methods=["POST"])
+def start_timelapse():
+    """
+    Start unattended time-lapse acquisition.
+
+    Body: {"interval": seconds, "count": shots (0 = until stopped),
+    "buffer_size": results kept (also capped in total size, see
+    timelapse.DEFAULT_MAX_BYTES), "include_photo": bool}.
+    Shutter and gain default to the current settings and can be overridden
+    with "shutter" (seconds) and "gain".
+    """
+    data = request.get_json(silent=True) or {}
+    settings = current_app.config["settings"]
+    timelapse = current_app.config["timelapse"]
+
+    try:
+        interval = float(data.get("interval", 60.0))
+        count = int(data.get("count", 0))
+        shutter = float(data.get("shutter", settings["shutter"]))
+        gain = float(data.get("gain", settings["gain"]))
+        buffer_size = int(data.get("buffer_size", 32))
+    except (ValueError, TypeError):
+        return jsonify({"status": "error", "message": "Invalid time-lapse parameters"}), 400
+
+    if interval <= 0 or count < 0 or not 1 <= buffer_size <= 1024:
+        return jsonify({"status": "error", "message": "Invalid time-lapse parameters"}), 400
+    if interval < shutter:
+        return jsonify({"status": "error", "message": "Interval must be at least the shutter time"}), 400
+
+    # Checked before touching the camera; start() checks again under its lock
+    if timelapse.is_running():
+        return jsonify({"status": "error", "message": "Time-lapse already running"}), 409
+
+    # The still session needs exclusive camera access
+    camera = current_app.config["camera"]
+    camera.stop_preview()
+    roi = _apply_roi(camera, settings, current_app.config["DATA_DIR"])
+
+    try:
+        timelapse.start(
+            interval=interval,
+            count=count,
+            shutter_us=int(shutter * 1_000_000),
+            gain=gain,
+            settings=settings,
+            buffer_size=buffer_size,
+            include_photo=bool(data.get("include_photo", False)),
+            roi=roi,
+        )
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+
+    return jsonify({"status": "ok", "message": "Time-lapse started", **timelapse.status()})
+
+
+@api_bp.route("/timelapse/stop", methods=["POST"])
+def stop_timelapse():
+    """
+    Stop time-lapse acquisition.
+
+    Returns once the camera is released, or after about a second if an
+    exposure is still in progress ("acquiring" in the response). Pending
+    shots are still processed in the background ("running").
+    """
+    timelapse = current_app.config["timelapse"]
+    timelapse.stop()
+    return jsonify({"status": "ok", "message": "Time-lapse stopped", **timelapse.status()})
+
+
+@api_bp.route("/timelapse/status", methods=["GET"])
+def timelapse_status():
+    """Get time-lapse progress."""
+    return jsonify(current_app.config["timelapse"].status())
+
+
+@api_bp.route("/timelapse/results", methods=["GET"])
+def timelapse_results():
+    """
+    Drain time-lapse results incrementally.
+
+    Query: since (sequence number from the previous call's "next"),
+    limit (max items), wait (seconds to long-poll when nothing is new).
+    "dropped" counts results overwritten in the ring buffer before being read.
+    """
+    timelapse = current_app.config["timelapse"]
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", 16))
+        wait_s = min(float(request.args.get("wait", 0)), 30.0)
+    except ValueError:
+        return jsonify({"error": "Invalid query parameters"}), 400
+
+    results = timelapse.results
+    if wait_s > 0 and timelapse.is_running():
+        results.wait(since, wait_s)
+
+    items, next_seq, dropped = results.since(since, limit=limit)
+    return jsonify({
+        "results": items,
+        "next": next_seq,
+        "dropped": dropped,
+        "running": timelapse.is_running(),
+    })
+
+
+@api_bp.route("/timelapse/stream", methods=["GET"])
+def timelapse_stream():
+    """
+    Subscribe to time-lapse results as NDJSON.
+
+    Streams each result as it is stored in the ring buffer, starting at
+    ``since``, until the run ends (or a new run replaces the buffer) and all
+    results have been sent.
+    """
+    timelapse = current_app.config["timelapse"]
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "Invalid query parameters"}), 400
+
+    def generate() -> Generator[bytes, None, None]:
+        results = timelapse.results
+        seq = since
+        while True:
+            # A new run replaces the ring; this subscriber's run is then over
+            running = timelapse.is_running() and timelapse.results is results
+            items, seq, dropped = results.since(seq)
+            if dropped:
+                yield (json.dumps({"dropped": dropped}) + "\n").encode("utf-8")
+            for item in items:
+                yield (json.dumps(item) + "\n").encode("utf-8")
+            if not running and not items:
+                break
+            if not items:
+                results.wait(seq, 1.0)
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+# ============================================================================
+# Batch Reprocessing Endpoint - Streams NDJSON results
+# ============================================================================
+
+
+def _iter_uploaded_files(stream, boundary: bytes, field: str) -> Generator[tuple, None, None]:
+    """
+    Incrementally parse a multipart body, yielding (filename, data, fields) per file.
+
+    ``fields`` holds the text form fields sent since the previous file, so
+    per-file metadata can be sent as fields just before each file. Only the
+    part currently being parsed is held in memory; the request body is read
+    from the socket in small chunks as the caller asks for more files.
+    """
+    from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+    decoder = MultipartDecoder(boundary)
+    fields = {}
+    current = None  # (kind, name, [chunks]) for the part being read
+
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            decoder.receive_data(stream.read(64 * 1024) or None)
+        elif isinstance(event, File):
+            current = ("file", event.filename, []) if event.name == field else None
+        elif isinstance(event, Field):
+            current = ("field", event.name, [])
+        elif isinstance(event, Data):
+            if current is not None:
+                current[2].append(event.data)
+                if not event.more_data:
+                    kind, name, chunks = current
+                    current = None
+                    if kind == "field":
+                        fields[name] = b"".join(chunks).decode("utf-8", "replace")
+                    else:
+                        yield name, b"".join(chunks), fields
+                        fields = {}
+        elif isinstance(event, Epilogue):
+            return
+
+
+@api_bp.route("/reprocess", methods=["POST"])
+def reprocess():
+    """
+    Reprocess stored photos with the current calibration.
+
+    Accepts a multipart upload with one or more JPEGs in the ``photos`` field.
+    Each photo may be preceded by a ``roi`` field holding the ``roi`` returned
+    by its capture (JSON, or ``null`` for full frame); photos without one are
+    treated as full frame. The crop is where the photo was taken on the
+    sensor, so it is never taken from the current calibration.
+    Laser settings can be overridden per batch with the ``laser_auto_detect``
+    and ``laser_wavelength`` query parameters (e.g. to match the original capture).
+    Photos are processed in parallel across CPU cores and results are streamed
+    back as NDJSON, one line per photo in completion order (``index`` refers to
+    the upload order).
+
+    Memory stays bounded regardless of batch size: the upload is parsed
+    incrementally and at most ``2 * workers`` photos are in memory at once.
+    New photos are only read when the client consumes results, so a slow
+    reader throttles both processing and the upload itself.
+    """
+    settings = dict(current_app.config["settings"])
+    data_dir = str(current_app.config["DATA_DIR"])
+
+    if "laser_wavelength" in request.args:
+        try:
+            settings["laser_wavelength"] = float(request.args["laser_wavelength"])
+        except ValueError:
+            return jsonify({"error": "Invalid value for laser_wavelength"}), 400
+    if "laser_auto_detect" in request.args:
+        settings["laser_auto_detect"] = request.args["laser_auto_detect"].lower() in ("1", "true", "yes")
+
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
+        return jsonify({"error": "Expected multipart/form-data upload"}), 400
+
+    stream = request.stream
+    workers = max(1, os.cpu_count() or 1)
+    max_in_flight = 2 * workers
+
+    def generate() -> Generator[bytes, None, None]:
+        from .processing import process_pool, reprocess_photo
+        from .roi import Roi
+
+        uploads = enumerate(_iter_uploaded_files(stream, boundary.encode("latin-1"), "photos"))
+
+        with process_pool(workers) as executor:
+            pending = {}
+            exhausted = False
+
+            while pending or not exhausted:
+                # Fill the window; photos are only read from the body when submitted
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        index, (filename, photo_bytes, fields) = next(uploads)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    except ValueError as e:
+                        # Malformed multipart body
+                        exhausted = True
+                        yield (json.dumps({"success": False, "error": f"Invalid upload: {e}"}) + "\n").encode("utf-8")
+                        break
+
+                    # Photos cropped at capture are placed back where they were taken
+                    try:
+                        roi_data = json.loads(fields.get("roi") or "null")
+                        roi = Roi.from_json_dict(roi_data) if roi_data is not None else None
+                    except ValueError as e:
+                        line = {"success": False, "error": str(e), "index": index, "filename": filename}
+                        yield (json.dumps(line) + "\n").encode("utf-8")
+                        continue
+
+                    future = executor.submit(reprocess_photo, photo_bytes, settings, data_dir, roi)
+                    pending[future] = (index, filename)
+                    del photo_bytes
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, filename = pending.pop(future)
+                    try:
+                        line = future.result()
+                    except Exception as e:
+                        logger.error(f"Reprocessing worker failed: {e}")
+                        line = {"success": False, "error": str(e)}
+                    line["index"] = index
+                    line["filename"] = filename
+                    yield (json.dumps(line) + "\n").encode("utf-8")
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
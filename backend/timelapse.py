@@ -0,0 +1,375 @@
+"""Unattended time-lapse acquisition.
+
+Captures photos on a fixed schedule with the camera kept configured between
+shots, and processes them in a separate process pool so processing of one
+shot never delays the next exposure. Results go into a ring buffer bounded by
+both entry count and total size (photos included with include_photo are
+several MB each) that clients drain incrementally, so memory stays bounded on
+long runs.
+"""
+
+import base64
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .processing import process_pool, reprocess_photo
+from .roi import Roi
+
+logger = logging.getLogger(__name__)
+
+# Total size of results kept in the ring buffer
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _approx_size(value: Any) -> int:
+    """Approximate size in bytes of a JSON-like result (strings dominate)."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(key) + _approx_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_approx_size(item) for item in value)
+    return 32
+
+
+class ResultRing:
+    """
+    Thread-safe bounded ring buffer of results with sequence numbers.
+
+    Each appended item gets a monotonically increasing sequence number.
+    Readers keep the last sequence number they saw and ask for newer items;
+    items evicted before being read are reported as dropped. The oldest items
+    are evicted when either the entry count or the total size limit is
+    exceeded; the newest item is always kept.
+    """
+
+    def __init__(self, capacity: int, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self._items: deque = deque()
+        self._capacity = capacity
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._next_seq = 0
+        self._condition = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def size_bytes(self) -> int:
+        with self._condition:
+            return self._bytes
+
+    @property
+    def next_seq(self) -> int:
+        with self._condition:
+            return self._next_seq
+
+    def append(self, item: Dict[str, Any]) -> int:
+        """Append an item, evicting the oldest while over a limit. Returns its sequence number."""
+        size = _approx_size(item)
+        with self._condition:
+            seq = self._next_seq
+            self._items.append((seq, item, size))
+            self._bytes += size
+            while len(self._items) > 1 and (
+                len(self._items) > self._capacity or self._bytes > self._max_bytes
+            ):
+                self._bytes -= self._items.popleft()[2]
+            self._next_seq += 1
+            self._condition.notify_all()
+            return seq
+
+    def since(self, seq: int, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Get items with sequence number >= seq.
+
+        Returns:
+            Tuple of (items, next_seq to pass on the following call, dropped count)
+        """
+        with self._condition:
+            oldest = self._items[0][0] if self._items else self._next_seq
+            dropped = max(0, oldest - seq)
+            items = [dict(item, seq=s) for s, item, _ in self._items if s >= seq]
+            if limit is not None:
+                items = items[:limit]
+            next_seq = items[-1]["seq"] + 1 if items else max(seq, oldest)
+            return items, next_seq, dropped
+
+    def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until an item with sequence number >= seq exists."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._next_seq > seq, timeout=timeout)
+
+    def notify(self) -> None:
+        """Wake up waiting readers (e.g. when the run ends)."""
+        with self._condition:
+            self._condition.notify_all()
+
+
+class Timelapse:
+    """
+    Scheduled acquisition runner.
+
+    Example:
+        >>> timelapse = Timelapse(camera, data_dir)
+        >>> timelapse.start(interval=60.0, count=120, shutter_us=5000000, gain=100.0, settings=settings)
+        >>> items, next_seq, dropped = timelapse.results.since(0)
+        >>> timelapse.stop()
+    """
+
+    def __init__(self, camera, data_dir: Path, buffer_size: int = 32) -> None:
+        self._camera = camera
+        self._data_dir = data_dir
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        # Cleared while a run holds the camera (acquiring); pending shots may
+        # still be processed after it is set again (draining)
+        self._camera_released = threading.Event()
+        self._camera_released.set()
+        self.results = ResultRing(buffer_size)
+
+        # Run state (protected by _lock)
+        self._config: Dict[str, Any] = {}
+        self._shots_taken = 0
+        self._processed = 0
+        self._pending = 0
+        self._skipped = 0
+        self._late_shots = 0
+        self._started_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    def is_running(self) -> bool:
+        """Check if a run is in progress (acquiring or processing pending shots)."""
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def is_acquiring(self) -> bool:
+        """Check if a run is using the camera."""
+        return not self._camera_released.is_set()
+
+    def start(
+        self,
+        interval: float,
+        count: int,
+        shutter_us: int,
+        gain: float,
+        settings: Dict[str, Any],
+        buffer_size: Optional[int] = None,
+        include_photo: bool = False,
+        roi: Optional[Roi] = None,
+    ) -> None:
+        """
+        Start a time-lapse run.
+
+        Args:
+            interval: Seconds between the start of consecutive shots
+            count: Number of shots, or 0 to run until stopped
+            shutter_us: Shutter speed in microseconds
+            gain: Camera gain
+            settings: Processing settings (laser_auto_detect, laser_wavelength)
+            buffer_size: Ring buffer capacity (results kept for clients); the
+                buffer is also capped at DEFAULT_MAX_BYTES in total
+            include_photo: Include base64 JPEG in each result
+            roi: Acquisition ROI set on the camera (for processing cropped shots)
+
+        Raises:
+            RuntimeError: If a run is in progress, including one that was
+                stopped but is still processing its pending shots
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                if self._camera_released.is_set():
+                    raise RuntimeError("Previous time-lapse is still processing")
+                raise RuntimeError("Time-lapse already running")
+
+            if buffer_size is not None:
+                # Wake subscribers of the previous run's ring so they can finish
+                self.results.notify()
+                self.results = ResultRing(buffer_size)
+            self._config = {
+                "interval": interval,
+                "count": count,
+                "shutter_us": shutter_us,
+                "gain": gain,
+                "include_photo": include_photo,
+            }
+            self._shots_taken = 0
+            self._processed = 0
+            self._pending = 0
+            self._skipped = 0
+            self._late_shots = 0
+            self._started_at = time.time()
+            self._last_error = None
+            self._stop_event.clear()
+            self._camera_released.clear()
+
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(dict(settings), roi),
+                name="timelapse",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1.0) -> bool:
+        """
+        Stop the current run; shots already taken are still processed.
+
+        Waits up to timeout seconds for the camera to be released (an exposure
+        in progress is not interrupted), but not for pending shots.
+
+        Returns:
+            True if the camera has been released
+        """
+        self._stop_event.set()
+        return self._camera_released.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Get run progress and configuration."""
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "acquiring": not self._camera_released.is_set(),
+                **self._config,
+                "shots_taken": self._shots_taken,
+                "processed": self._processed,
+                "pending": self._pending,
+                "skipped": self._skipped,
+                "late_shots": self._late_shots,
+                "started_at": self._started_at,
+                "last_error": self._last_error,
+                "next_seq": self.results.next_seq,
+                "buffer_size": self.results.capacity,
+                "buffer_bytes": self.results.size_bytes,
+                "buffer_max_bytes": self.results.max_bytes,
+            }
+
+    def _run(self, settings: Dict[str, Any], roi: Optional[Roi]) -> None:
+        """Acquisition loop: capture on schedule, hand off processing."""
+        interval = self._config["interval"]
+        count = self._config["count"]
+        include_photo = self._config["include_photo"]
+        roi_json = roi.to_json_dict() if roi else None
+
+        # Leave one core for acquisition and the web server
+        workers = max(1, (os.cpu_count() or 1) - 1)
+        max_pending = 2 * workers
+
+        # Created before the camera is opened so workers never inherit its state
+        executor = process_pool(workers)
+        try:
+            self._camera.start_still_session(
+                shutter_us=self._config["shutter_us"],
+                gain=self._config["gain"],
+            )
+        except Exception as e:
+            logger.exception("Failed to start time-lapse session")
+            self._camera_released.set()
+            executor.shutdown(wait=False)
+            with self._lock:
+                self._last_error = str(e)
+            self.results.notify()
+            return
+
+        try:
+            start = time.monotonic()
+            shot = 0
+            while (count == 0 or shot < count) and not self._stop_event.is_set():
+                # Schedule is anchored to the start time so delays don't accumulate
+                deadline = start + shot * interval
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    if self._stop_event.wait(delay):
+                        break
+                elif shot > 0 and -delay > 0.1 * interval:
+                    with self._lock:
+                        self._late_shots += 1
+
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                try:
+                    photo_bytes = self._camera.capture_still()
+                except Exception as e:
+                    logger.error(f"Time-lapse capture {shot} failed: {e}")
+                    with self._lock:
+                        self._last_error = str(e)
+                    self.results.append({
+                        "index": shot, "timestamp": timestamp, "roi": roi_json, "success": False, "error": str(e),
+                    })
+                    shot += 1
+                    continue
+
+                with self._lock:
+                    self._shots_taken += 1
+                    backlog = self._pending >= max_pending
+                    if not backlog:
+                        self._pending += 1
+                    else:
+                        self._skipped += 1
+
+                # roi is needed to reprocess the photo later (see /api/reprocess)
+                base = {"index": shot, "timestamp": timestamp, "roi": roi_json}
+                if include_photo:
+                    base["photo"] = base64.b64encode(photo_bytes).decode("ascii")
+
+                if backlog:
+                    # Never block the schedule on processing
+                    self.results.append(dict(base, success=False, error="Processing backlog, shot not processed"))
+                else:
+                    try:
+                        future = executor.submit(reprocess_photo, photo_bytes, settings, str(self._data_dir), roi)
+                    except BrokenProcessPool as e:
+                        # A worker died (e.g. killed for memory); this shot is lost
+                        logger.error(f"Time-lapse processing pool broken at shot {shot}: {e}")
+                        with self._lock:
+                            self._pending -= 1
+                            self._last_error = f"Processing pool failed: {e}"
+                        self.results.append(dict(base, success=False, error=f"Processing pool failed: {e}"))
+                        executor.shutdown(wait=False)
+                        try:
+                            executor = process_pool(workers)
+                        except Exception as e:
+                            logger.exception("Failed to recreate time-lapse processing pool")
+                            with self._lock:
+                                self._last_error = f"Processing pool failed, run stopped: {e}"
+                            executor = None
+                            break
+                    else:
+                        future.add_done_callback(lambda f, base=base: self._on_processed(f, base))
+                del photo_bytes
+                shot += 1
+        finally:
+            try:
+                self._camera.stop_still_session()
+            except Exception as e:
+                logger.warning(f"Failed to stop time-lapse session: {e}")
+            self._camera_released.set()
+            if executor is not None:
+                executor.shutdown(wait=True)
+            logger.info("Time-lapse finished: %s", self.status())
+            self.results.notify()
+
+    def _on_processed(self, future, base: Dict[str, Any]) -> None:
+        """Store a processing result in the ring buffer."""
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        result.update(base)
+
+        with self._lock:
+            self._pending -= 1
+            self._processed += 1
+        self.results.append(result)
@@ -46,6 +46,8 @@ const state = {
     // UI state
     previewActive: false,
     startingPreview: false,
+    roiEnabled: true,  // Preview/capture cropped to the spectral band
+    spectralBand: false,  // Calibration describes the band (cropping possible)
     capturing: false,
     currentAcquisition: null,
     darkMode: true,
@@ -122,6 +124,7 @@ const elements = {
     previewPlaceholder: document.getElementById('previewPlaceholder'),
     startPreviewBtn: document.getElementById('startPreviewBtn'),
     stopPreviewBtn: document.getElementById('stopPreviewBtn'),
+    roiToggleBtn: document.getElementById('roiToggleBtn'),
     previewStatus: document.getElementById('previewStatus'),
     calibrationStatus: document.getElementById('calibrationStatus'),
     step2BackBtn: document.getElementById('step2BackBtn'),
@@ -242,6 +245,7 @@ const elements = {
     historyViewPlotBtn: document.getElementById('historyViewPlotBtn'),
     historyViewMatchesBtn: document.getElementById('historyViewMatchesBtn'),
     historyDownloadCsvBtn: document.getElementById('historyDownloadCsvBtn'),
+    historyReprocessBtn: document.getElementById('historyReprocessBtn'),
 
     // Language
     langRadioEn: document.getElementById('langRadioEn'),
@@ -430,7 +434,30 @@ const api = {
     // Use 20s timeout for preview start (camera initialization takes time)
     async startPreview() { return this.post('/preview/start', {}, 20000); },
     async stopPreview() { return this.post('/preview/stop'); },
+    // Restarts a running preview, so allow as long as preview start
+    async setPreviewRoi(enabled) { return this.post('/preview/roi', { enabled }, 20000); },
     async getPreviewStatus() { return this.get('/preview/status', 15000); },
+
+    /**
+     * Reprocess stored acquisitions with the Pi's current calibration.
+     * Each photo is sent with the ROI it was captured with, so cropped photos
+     * are placed back where they were taken on the sensor.
+     * @param {Array<{acquisition: Object, photo: Blob}>} items - Acquisitions and their photos
+     * @param {Object} [query] - Laser overrides (laser_auto_detect, laser_wavelength)
+     * @returns {Promise<Response>} NDJSON stream, one result per photo (index = position in items)
+     */
+    async reprocess(items, query = {}, timeout = 600000) {
+        const form = new FormData();
+        for (const { acquisition, photo } of items) {
+            form.append('roi', JSON.stringify(acquisition.roi || null));
+            form.append('photos', photo, `${acquisition.timestamp}_photo.jpg`);
+        }
+        const params = new URLSearchParams(query).toString();
+        return this.fetchWithTimeout(`${PI_API_URL}/api/reprocess${params ? `?${params}` : ''}`, {
+            method: 'POST',
+            body: form,
+        }, timeout);
+    },
 };
 
 // ============================================================================
@@ -521,8 +548,12 @@ function setPiConnected(isConnected) {
 
 async function checkPiConnectivity() {
     try {
-        await api.getSettings();
+        const piSettings = await api.getSettings();
         setPiConnected(true);
+        if (typeof piSettings.roi_enabled === 'boolean' && piSettings.roi_enabled !== state.roiEnabled) {
+            state.roiEnabled = piSettings.roi_enabled;
+            updateRoiToggleUI();
+        }
         state.piCheckIntervalMs = 10000;
     } catch (error) {
         setPiConnected(false);
@@ -1035,6 +1066,44 @@ function resetPreviewUI() {
     elements.previewStatus.textContent = '';
 }
 
+function updateRoiToggleUI() {
+    // Button shows the view it switches to (data-i18n keeps it on language change)
+    const key = state.roiEnabled ? 'buttons.fullFrame' : 'buttons.spectralBand';
+    elements.roiToggleBtn.dataset.i18n = key;
+    elements.roiToggleBtn.textContent = i18n.t(key);
+    // Without a calibrated band both views are the full frame
+    elements.roiToggleBtn.classList.toggle('hidden', !state.spectralBand);
+}
+
+function setSpectralBand(available) {
+    if (typeof available !== 'boolean' || available === state.spectralBand) return;
+    state.spectralBand = available;
+    updateRoiToggleUI();
+}
+
+async function toggleRoi() {
+    elements.roiToggleBtn.disabled = true;
+    try {
+        const response = await api.setPreviewRoi(!state.roiEnabled);
+        if (response.status === 'error') {
+            elements.previewStatus.textContent = i18n.t('preview.error', { message: response.message });
+            return;
+        }
+        state.roiEnabled = response.roi_enabled;
+        updateRoiToggleUI();
+
+        // Preview was restarted with the new crop: reconnect to the stream
+        if (state.previewActive) {
+            elements.previewImage.src = `${PI_API_URL}/api/preview/stream?t=${Date.now()}`;
+        }
+    } catch (error) {
+        console.error('Failed to toggle ROI:', error);
+        elements.previewStatus.textContent = i18n.t('preview.error', { message: error.message });
+    } finally {
+        elements.roiToggleBtn.disabled = false;
+    }
+}
+
 function getExposureInfo(exp_us) {
     if (exp_us < 3000) return { text: i18n.t('step3.exposure.perfect'), class: 'exp-perfect' };
     if (exp_us < 6000) return { text: i18n.t('step3.exposure.good'), class: 'exp-good' };
@@ -1049,6 +1118,7 @@ async function pollPreviewStatus() {
     try {
         const status = await api.getPreviewStatus();
         console.log('Preview status:', status);
+        setSpectralBand(status.spectral_band);
         if (status.streaming) {
             const expInfo = getExposureInfo(status.exposure_us);
             elements.previewStatus.innerHTML = i18n.t('preview.status', {
@@ -1076,8 +1146,9 @@ async function pollPreviewStatus() {
 }
 
 function updateCalibrationUI(status) {
-    const { camera_calibration, wavelength_calibration } = status;
+    const { camera_calibration, wavelength_calibration, spectral_band } = status;
     const allOk = camera_calibration && wavelength_calibration;
+    setSpectralBand(spectral_band);
 
     elements.calibrationStatus.className = 'calibration-status ' + (allOk ? 'ok' : 'missing');
     elements.calibrationStatus.textContent = `${i18n.t('step2.status.camera')}: ${camera_calibration ? i18n.t('step2.status.ok') : i18n.t('step2.status.missing')} | ${i18n.t('step2.status.wavelength')}: ${wavelength_calibration ? i18n.t('step2.status.ok') : i18n.t('step2.status.missing')}`;
@@ -1224,6 +1295,30 @@ async function capture() {
     }
 }
 
+/**
+ * Identify a preprocessed spectrum against the local library.
+ * @param {number[]|null} preprocessed - Preprocessed spectrum from the Pi
+ * @returns {Array|null} Top matches, or null if unavailable
+ */
+function identifySpectrum(preprocessed) {
+    if (preprocessed && identifier.isReady()) {
+        const matches = identifier.identify(preprocessed, 5);
+        const identification = matches.map((m, i) => ({
+            rank: i + 1,
+            substance: m.substance,
+            score: Math.round(m.score * 1000) / 1000,
+        }));
+        console.log('Browser identification:', identification);
+        return identification;
+    }
+    if (!identifier.isReady()) {
+        console.warn('Identification library not ready');
+    } else {
+        console.warn('No preprocessed spectrum data received');
+    }
+    return null;
+}
+
 async function captureComplete(result) {
     state.capturing = false;
     elements.captureBtn.disabled = false;
@@ -1260,20 +1355,7 @@ async function captureComplete(result) {
             }
 
             // Perform browser-side identification
-            let identification = null;
-            if (result.preprocessed_spectrum && identifier.isReady()) {
-                const matches = identifier.identify(result.preprocessed_spectrum, 5);
-                identification = matches.map((m, i) => ({
-                    rank: i + 1,
-                    substance: m.substance,
-                    score: Math.round(m.score * 1000) / 1000,
-                }));
-                console.log('Browser identification:', identification);
-            } else if (!identifier.isReady()) {
-                console.warn('Identification library not ready');
-            } else {
-                console.warn('No preprocessed spectrum data received');
-            }
+            const identification = identifySpectrum(result.preprocessed_spectrum);
 
             // Store acquisition in IndexedDB
             const acquisition = await db.addAcquisition(
@@ -1284,6 +1366,7 @@ async function captureComplete(result) {
                     identification: identification,
                     laserWavelength: result.laser_wavelength,
                     detectionMode: result.detection_mode,
+                    roi: result.roi || null,
                     csv: result.csv,
                 },
                 files
@@ -1794,6 +1877,60 @@ async function showHistoryAcquisition(idx) {
 
     elements.historyDownloadCsvBtn.onclick = () => downloadCsv(acquisition);
     elements.historyDownloadCsvBtn.disabled = !acquisition.csv;
+
+    elements.historyReprocessBtn.onclick = () => reprocessHistoryAcquisition(idx);
+    elements.historyReprocessBtn.disabled = !acquisition.fileIds?.photo || !state.piConnected;
+}
+
+/**
+ * Reprocess a stored acquisition's photo with the Pi's current calibration
+ * and replace its spectrum, CSV and identification.
+ */
+async function reprocessHistoryAcquisition(idx) {
+    const acquisition = state.historyAcquisitions[idx];
+    const file = acquisition?.fileIds?.photo ? await db.getFile(acquisition.fileIds.photo) : null;
+    if (!file?.data) return;
+
+    // Keep the laser wavelength of a manual capture; auto-detected ones are detected again
+    const query = acquisition.detectionMode && acquisition.detectionMode !== 'auto' && acquisition.laserWavelength
+        ? { laser_auto_detect: '0', laser_wavelength: String(acquisition.laserWavelength) }
+        : {};
+
+    elements.historyReprocessBtn.disabled = true;
+    elements.historyReprocessBtn.textContent = i18n.t('buttons.reprocessing');
+    try {
+        const response = await api.reprocess([{ acquisition, photo: file.data }], query);
+        const line = (await response.text()).split('\n').find(l => l.trim());
+        const result = line ? JSON.parse(line) : null;
+        if (!result?.success) {
+            throw new Error(result?.error || 'No result');
+        }
+
+        // Reprocessing does not render a summary plot; drop the outdated one
+        const fileIds = { ...acquisition.fileIds };
+        if (fileIds.summaryPlot) {
+            await db.deleteFile(fileIds.summaryPlot);
+            delete fileIds.summaryPlot;
+        }
+
+        state.historyAcquisitions[idx] = await db.updateAcquisition(acquisition.id, {
+            spectrum: result.spectrum,
+            identification: identifySpectrum(result.preprocessed_spectrum),
+            laserWavelength: result.laser_wavelength,
+            detectionMode: result.detection_mode,
+            csv: result.csv,
+            fileIds,
+        });
+    } catch (error) {
+        console.error('Reprocessing failed:', error);
+        alert(i18n.t('errors.reprocessFailed', { error: error.message }));
+    } finally {
+        elements.historyReprocessBtn.textContent = i18n.t('buttons.reprocess');
+    }
+
+    if (state.historyCurrentAcquisition?.id === acquisition.id) {
+        await showHistoryAcquisition(idx);
+    }
 }
 
 function formatHistoryDate(isoString) {
@@ -2697,6 +2834,7 @@ function setupEventListeners() {
     // Step 2 controls
     elements.startPreviewBtn.addEventListener('click', startPreview);
     elements.stopPreviewBtn.addEventListener('click', stopPreview);
+    elements.roiToggleBtn.addEventListener('click', toggleRoi);
     elements.step2BackBtn.addEventListener('click', handleStep2Back);
     elements.step2ConfirmBtn.addEventListener('click', handleStep2Confirm);
     elements.filterBayModalOk.addEventListener('click', handleFilterBayModalOk);
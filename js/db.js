@@ -310,6 +310,7 @@ async function addAcquisition(sessionId, data, files = {}) {
         identification: data.identification || [],
         laserWavelength: data.laserWavelength,
         detectionMode: data.detectionMode,
+        roi: data.roi || null,  // Sensor crop of the photo (null = full frame)
         csv: data.csv,  // CSV string
         createdAt: new Date().toISOString(),
         fileIds: {},
@@ -360,6 +361,35 @@ async function getAcquisition(id) {
     });
 }
 
+/**
+ * Update an acquisition.
+ * @param {string} id - Acquisition ID
+ * @param {Object} updates - Fields to update
+ * @returns {Promise<Object>}
+ */
+async function updateAcquisition(id, updates) {
+    const db = await openDB();
+    const acquisition = await getAcquisition(id);
+    if (!acquisition) {
+        throw new Error(`Acquisition not found: ${id}`);
+    }
+
+    const updatedAcquisition = {
+        ...acquisition,
+        ...updates,
+        updatedAt: new Date().toISOString(),
+    };
+
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(STORES.acquisitions, 'readwrite');
+        const store = tx.objectStore(STORES.acquisitions);
+        const request = store.put(updatedAcquisition);
+
+        request.onsuccess = () => resolve(updatedAcquisition);
+        request.onerror = () => reject(request.error);
+    });
+}
+
 /**
  * Get all acquisitions for a session.
  * @param {string} sessionId - Session ID
@@ -936,6 +966,7 @@ const db = {
     // Acquisitions
     addAcquisition,
     getAcquisition,
+    updateAcquisition,
     getAcquisitionsBySession,
     deleteAcquisition,
 